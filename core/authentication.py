@@ -0,0 +1,182 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission, _user_get_permissions, _user_has_module_perms, _user_has_perm
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject, cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+CUSTOMER_ID_CLAIM = 'customer_id'
+IS_STAFF_CLAIM = 'is_staff'
+PERMS_VERSION_CLAIM = 'perms_version'
+
+
+def _perms_version_key(user_id):
+    return f'core:perms_version:{user_id}'
+
+
+def get_perms_version(user_id):
+    """
+    Returns the version of what the user's tokens may claim about them,
+    bumped whenever that could have changed.
+
+    Like store.cache.get_versions, a missing version starts from the time in
+    milliseconds so an evicted one never matches an old token again.
+    """
+    key = _perms_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_perms_version(user_id):
+    key = _perms_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The user of a token whose claims are still current. The id, is_staff and
+    customer_id come from the token and permissions from
+    core.backends.CachedModelBackend; anything else, including saving, loads
+    the user row the first time it's needed and goes to it.
+    """
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        self.__dict__['token'] = token
+        super().__init__(lambda: User.objects.get(**{api_settings.USER_ID_FIELD: self.id}))
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    @cached_property
+    def id(self):
+        return self.token[api_settings.USER_ID_CLAIM]
+
+    @property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def is_staff(self):
+        return self.token[IS_STAFF_CLAIM]
+
+    @cached_property
+    def customer_id(self):
+        """The id of the user's customer profile, None without one."""
+        return self.token[CUSTOMER_ID_CLAIM]
+
+    @cached_property
+    def perms_version(self):
+        return self.token[PERMS_VERSION_CLAIM]
+
+    # Like User's, minus the shortcut for superusers, whose cached
+    # permissions are all of them anyway.
+    def get_all_permissions(self, obj=None):
+        return _user_get_permissions(self, obj, 'all')
+
+    def has_perm(self, perm, obj=None):
+        return _user_has_perm(self, perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label):
+        return _user_has_module_perms(self, app_label)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the claims put in the token by
+    core.serializers.TokenObtainPairSerializer instead of loading the user on
+    every request. Tokens issued before the user's perms_version was bumped,
+    or without the claims, fall back to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if PERMS_VERSION_CLAIM in validated_token and api_settings.USER_ID_CLAIM in validated_token:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            if validated_token[PERMS_VERSION_CLAIM] == get_perms_version(user_id):
+                return ClaimsUser(validated_token)
+        return super().get_user(validated_token)
+
+
+def forget_perms(user_ids):
+    """
+    Bumps the perms_version of the users, now and again once the transaction
+    commits, so that nothing read before the commit is cached as current.
+    """
+    user_ids = list(user_ids)
+
+    def bump():
+        for user_id in user_ids:
+            bump_perms_version(user_id)
+    bump()
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_claims(sender, instance, **kwargs):
+    # is_staff, is_superuser or is_active may have changed, or the user is
+    # gone and their tokens must stop working.
+    forget_perms([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def forget_user_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            forget_perms([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        forget_perms(pk_set)
+    elif action == 'pre_clear':
+        # instance is the permission or group.
+        forget_perms(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def forget_group_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            forget_perms(User.objects.filter(groups=instance).values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        forget_perms(User.objects.filter(groups__in=pk_set).values_list('pk', flat=True).distinct())
+    elif action == 'pre_clear':
+        forget_perms(User.objects.filter(groups__permissions=instance).values_list('pk', flat=True).distinct())
+
+
+@receiver(pre_delete, sender=Group)
+def forget_deleted_group_perms(sender, instance, **kwargs):
+    forget_perms(User.objects.filter(groups=instance).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Permission)
+def forget_deleted_perm(sender, instance, **kwargs):
+    user_ids = User.objects \
+        .filter(Q(user_permissions=instance) | Q(groups__permissions=instance)) \
+        .values_list('pk', flat=True) \
+        .distinct()
+    forget_perms(user_ids)
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Exists, Q
+
+from .authentication import ClaimsUser, get_perms_version
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps each user's resolved permissions in the cache,
+    keyed by their perms_version, which core.authentication bumps whenever
+    they could have changed. Permission checks then don't query the database
+    until the next change, even for a ClaimsUser that was never loaded.
+    """
+
+    def load_permissions(self, user_id):
+        """
+        The user's own and group permissions, or all of them for a superuser,
+        in one query that doesn't need the user row.
+        """
+        is_superuser = Exists(get_user_model().objects.filter(pk=user_id, is_superuser=True))
+        perms = Permission.objects \
+            .filter(Q(is_superuser) | Q(user=user_id) | Q(group__user=user_id)) \
+            .values_list('content_type__app_label', 'codename') \
+            .order_by() \
+            .distinct()
+        return {f'{app_label}.{codename}' for app_label, codename in perms}
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if isinstance(user_obj, ClaimsUser):
+            # Checked against the current version when the token was.
+            version = user_obj.perms_version
+        else:
+            version = get_perms_version(user_obj.pk)
+        key = f'core:perms:{user_obj.pk}:{version}'
+        perms = cache.get(key)
+        if perms is None:
+            perms = self.load_permissions(user_obj.pk)
+            cache.set(key, perms, getattr(settings, 'CORE_PERMS_CACHE_TIMEOUT', 60 * 60 * 24))
+        return perms
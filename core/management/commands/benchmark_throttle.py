@@ -0,0 +1,63 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+import redis
+
+from core.throttling import TokenBucketThrottle, get_token_buckets
+
+
+def measure(call, number):
+    """Returns the mean, median and 99th percentile of `call` in microseconds."""
+    for _ in range(min(number, 100)):
+        call()
+    timings = []
+    for _ in range(number):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000000)
+    timings.sort()
+    return statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+class Command(BaseCommand):
+    help = 'Measures the overhead of core.throttling.TokenBucketThrottle per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Redis to use, CORE_THROTTLE_REDIS_URL by default')
+        parser.add_argument('--number', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        overrides = {'CORE_THROTTLE_BUCKETS': {'benchmark': ('1000000/s', 1000000)}}
+        if options['url']:
+            overrides['CORE_THROTTLE_REDIS_URL'] = options['url']
+
+        with override_settings(**overrides):
+            buckets = get_token_buckets()
+            try:
+                buckets.client.ping()
+            except redis.RedisError as error:
+                raise CommandError(f'Redis is not available: {error}')
+
+            request = Request(APIRequestFactory().post('/store/carts/'))
+            request.user = AnonymousUser()
+            view = SimpleNamespace(throttle_scope='benchmark')
+            throttle = TokenBucketThrottle()
+            number = options['number']
+            results = {
+                'PING': measure(buckets.client.ping, number),
+                'TokenBuckets.take': measure(
+                    lambda: buckets.take('core:throttle:benchmark:take', 1000000, 1000000), number),
+                'allow_request': measure(lambda: throttle.allow_request(request, view), number),
+            }
+
+        self.stdout.write(f'{"":<20} {"mean µs":>10} {"p50 µs":>10} {"p99 µs":>10}')
+        for name, (mean, p50, p99) in results.items():
+            self.stdout.write(f'{name:<20} {mean:>10.1f} {p50:>10.1f} {p99:>10.1f}')
+        overhead = results['allow_request'][1] - results['PING'][1]
+        self.stdout.write(f'{"over a round trip":<20} {overhead:>21.1f}')
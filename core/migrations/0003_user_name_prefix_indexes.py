@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Case-insensitive prefix searches (istartswith), like CustomerAdmin's, can't
+# use core_user_name_idx. On PostgreSQL Django compares UPPER(column) with
+# LIKE, which needs an index on the same expression with text_pattern_ops
+# unless the database uses the C collation. SQLite's LIKE is case-insensitive
+# and uses an index with the NOCASE collation.
+FIELDS = ['first_name', 'last_name']
+
+
+def create_prefix_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for field in FIELDS:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE INDEX core_user_{field}_prefix_idx ON core_user (UPPER({field}) text_pattern_ops)')
+        elif vendor == 'sqlite':
+            schema_editor.execute(
+                f'CREATE INDEX core_user_{field}_prefix_idx ON core_user ({field} COLLATE NOCASE)')
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        for field in FIELDS:
+            schema_editor.execute(f'DROP INDEX core_user_{field}_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_user_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -1,4 +1,9 @@
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 class User(AbstractUser):
-    pass
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Customer and CustomerAdmin order by the user's name.
+            models.Index(fields=['first_name', 'last_name'], name='core_user_name_idx'),
+        ]
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer, UserSerializer as BaseUserSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer
+
+from .authentication import CUSTOMER_ID_CLAIM, IS_STAFF_CLAIM, PERMS_VERSION_CLAIM, get_perms_version
 
 
 class UserCreateSerializer(BaseUserCreateSerializer):
@@ -8,4 +13,30 @@ class UserCreateSerializer(BaseUserCreateSerializer):
 
 class UserSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
-        fields = ['id', 'email', 'username', 'first_name', 'last_name']
\ No newline at end of file
+        fields = ['id', 'email', 'username', 'first_name', 'last_name']
+
+
+def get_customer_id(user):
+    """
+    Returns the id of the user's customer profile, or None without one, from
+    the function CORE_CUSTOMER_ID_FUNCTION names.
+    """
+    path = getattr(settings, 'CORE_CUSTOMER_ID_FUNCTION', None)
+    return import_string(path)(user) if path else None
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """
+    Adds the claims ClaimsJWTAuthentication reads to the refresh token, which
+    copies them to its access tokens.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Read the version first: a change made while the claims are read
+        # bumps it past the one in the token.
+        token[PERMS_VERSION_CLAIM] = get_perms_version(user.pk)
+        token[IS_STAFF_CLAIM] = user.is_staff
+        token[CUSTOMER_ID_CLAIM] = get_customer_id(user)
+        return token
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from rest_framework.test import APIClient
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    # The requests go through store's views, which declare budgets.
+    settings.STORE_QUERY_BUDGET_ENABLED = True
+    settings.STORE_QUERY_BUDGET_RAISE = True
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(settings):
+    settings.CORE_THROTTLE_BUCKETS = {}
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+import pytest
+
+from core.authentication import ClaimsUser
+
+User = get_user_model()
+
+
+@pytest.fixture
+def add_collection():
+    return Permission.objects.get(content_type__app_label='store', codename='add_collection')
+
+
+@pytest.fixture
+def group(add_collection):
+    group = Group.objects.create(name='Catalog')
+    group.permissions.add(add_collection)
+    return group
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username='john', password='secret-password', is_staff=True)
+
+
+def login(api_client):
+    response = api_client.post('/auth/jwt/create/', {'username': 'john', 'password': 'secret-password'})
+    assert response.status_code == status.HTTP_200_OK
+    api_client.credentials(HTTP_AUTHORIZATION=f'JWT {response.data["access"]}')
+
+
+def create_collection(api_client):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.post('/store/collections/', {'title': 'a'})
+    return response, [query['sql'] for query in context.captured_queries if 'auth_permission' in query['sql']]
+
+
+@pytest.mark.django_db
+class TestCachedPermissions:
+    def test_permissions_are_queried_once(self, api_client, user, group):
+        user.groups.add(group)
+        login(api_client)
+
+        first, first_queries = create_collection(api_client)
+        second, second_queries = create_collection(api_client)
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_201_CREATED
+        assert first_queries
+        assert second_queries == []
+        assert isinstance(second.wsgi_request.user, ClaimsUser)
+
+    def test_claims_user_checks_permissions_without_queries(self, api_client, user, group):
+        user.groups.add(group)
+        login(api_client)
+        create_collection(api_client)
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post('/store/collections/', {'title': 'a'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        # Just the insert.
+        assert len(context.captured_queries) == 1
+
+    def test_joining_a_group_is_picked_up(self, api_client, settings, user, group):
+        # The token is outdated by the change, so the user is loaded again.
+        settings.STORE_QUERY_BUDGET_RAISE = False
+        login(api_client)
+        assert create_collection(api_client)[0].status_code == status.HTTP_403_FORBIDDEN
+
+        user.groups.add(group)
+
+        assert create_collection(api_client)[0].status_code == status.HTTP_201_CREATED
+
+    def test_group_permission_changes_are_picked_up(self, api_client, settings, user, group, add_collection):
+        settings.STORE_QUERY_BUDGET_RAISE = False
+        user.groups.add(group)
+        login(api_client)
+        assert create_collection(api_client)[0].status_code == status.HTTP_201_CREATED
+
+        group.permissions.remove(add_collection)
+        assert create_collection(api_client)[0].status_code == status.HTTP_403_FORBIDDEN
+
+        add_collection.group_set.add(group)
+        assert create_collection(api_client)[0].status_code == status.HTTP_201_CREATED
+
+    def test_user_permission_changes_are_picked_up(self, api_client, user, add_collection):
+        api_client.force_authenticate(user=user)
+        user.user_permissions.add(add_collection)
+        assert create_collection(api_client)[0].status_code == status.HTTP_201_CREATED
+
+        add_collection.user_set.clear()
+
+        assert create_collection(api_client)[0].status_code == status.HTTP_403_FORBIDDEN
+
+    def test_deleting_a_group_is_picked_up(self, api_client, user, group):
+        user.groups.add(group)
+        api_client.force_authenticate(user=user)
+        assert create_collection(api_client)[0].status_code == status.HTTP_201_CREATED
+
+        group.delete()
+
+        assert create_collection(api_client)[0].status_code == status.HTTP_403_FORBIDDEN
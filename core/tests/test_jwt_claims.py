@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+from model_bakery import baker
+
+from core.authentication import ClaimsUser
+from store import models
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(username='john', password='secret-password')
+    baker.make(models.Customer, user=user)
+    return user
+
+
+def login(api_client, username='john'):
+    response = api_client.post('/auth/jwt/create/', {'username': username, 'password': 'secret-password'})
+    assert response.status_code == status.HTTP_200_OK
+    api_client.credentials(HTTP_AUTHORIZATION=f'JWT {response.data["access"]}')
+    return AccessToken(response.data['access'])
+
+
+def user_queries(api_client, url, method='get', **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(api_client, method)(url, **kwargs)
+    return response, [query['sql'] for query in context.captured_queries if '"core_user"' in query['sql']]
+
+
+@pytest.mark.django_db
+class TestJWTClaims:
+    def test_tokens_carry_the_claims(self, api_client, user):
+        token = login(api_client)
+
+        assert token['customer_id'] == user.customer.id
+        assert token['is_staff'] is False
+        assert 'perms_version' in token
+
+    def test_requests_skip_the_user_and_customer_lookups(self, api_client, user):
+        baker.make(models.Order, customer=user.customer)
+        login(api_client)
+
+        response, queries = user_queries(api_client, '/store/orders/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert queries == []
+        assert isinstance(response.wsgi_request.user, ClaimsUser)
+
+    def test_user_is_loaded_when_needed(self, api_client, user):
+        login(api_client)
+
+        response, queries = user_queries(api_client, '/auth/users/me/', method='patch', data={'first_name': 'Jo'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['username'] == 'john'
+        assert User.objects.get().first_name == 'Jo'
+        assert queries
+
+    def test_changed_users_are_loaded_again(self, api_client, user):
+        login(api_client)
+        user.is_staff = True
+        user.save()
+
+        response, queries = user_queries(api_client, '/store/orders/payment-status/', method='post',
+                                         data={'order_ids': [1], 'payment_status': 'C'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries
+
+    def test_deleted_users_tokens_stop_working(self, api_client, user):
+        user.is_staff = True
+        user.save()
+        login(api_client)
+
+        user.delete()
+
+        assert api_client.get('/store/orders/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_new_customer_profile_is_picked_up(self, api_client):
+        user = User.objects.create_user(username='jane', password='secret-password')
+        assert login(api_client, 'jane')['customer_id'] is None
+
+        customer = baker.make(models.Customer, user=user)
+        baker.make(models.Order, customer=customer)
+
+        assert len(api_client.get('/store/orders/').data) == 1
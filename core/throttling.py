@@ -0,0 +1,117 @@
+import logging
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+import redis
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'core:throttle:{}:{}'
+DURATIONS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+# Takes the capacity, the refill rate in tokens per second and the number of
+# tokens to take. Returns 1 and 0 if they were taken, or 0 and the seconds
+# until they can be, as a string since Lua numbers come back truncated.
+TAKE_TOKENS = """
+local capacity, rate, requested = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+if wait > 0 then return {0, tostring(wait)} end
+return {1, '0'}
+"""
+
+
+@lru_cache
+def parse_rate(rate):
+    """Returns the tokens per second of a rate like DRF's, e.g. '120/min'."""
+    count, period = rate.split('/')
+    return int(count) / DURATIONS[period[0]]
+
+
+def get_buckets():
+    """Returns {scope: (capacity, tokens per second)} from CORE_THROTTLE_BUCKETS."""
+    return {
+        scope: (burst, parse_rate(rate))
+        for scope, (rate, burst) in getattr(settings, 'CORE_THROTTLE_BUCKETS', {}).items()
+    }
+
+
+class TokenBuckets:
+    """
+    Token buckets in Redis, each taken from atomically by a Lua script that
+    refills it first. When Redis can't be reached every request is let
+    through, and Redis isn't tried again for `retry_interval` seconds so
+    requests don't all wait for its timeout.
+    """
+
+    def __init__(self, client, retry_interval):
+        self.client = client
+        self.retry_interval = retry_interval
+        self.script = client.register_script(TAKE_TOKENS)
+        self.down_until = 0
+
+    def take(self, key, capacity, rate, tokens=1):
+        """Returns (True, 0) if the tokens were taken, else (False, seconds to wait)."""
+        if self.down_until > time.monotonic():
+            return True, 0
+        try:
+            taken, wait = self.script(keys=[key], args=[capacity, rate, tokens])
+        except redis.RedisError:
+            logger.warning('Throttling is off for %ss, Redis is unavailable', self.retry_interval, exc_info=True)
+            self.down_until = time.monotonic() + self.retry_interval
+            return True, 0
+        return bool(taken), float(wait)
+
+
+_buckets = {}
+
+
+def get_token_buckets():
+    url = getattr(settings, 'CORE_THROTTLE_REDIS_URL', 'redis://redis:6379/4')
+    if url not in _buckets:
+        timeout = getattr(settings, 'CORE_THROTTLE_REDIS_TIMEOUT', 0.05)
+        client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        _buckets[url] = TokenBuckets(client, getattr(settings, 'CORE_THROTTLE_RETRY_INTERVAL', 30))
+    return _buckets[url]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttles the writes of views with a throttle_scope that has a bucket in
+    CORE_THROTTLE_BUCKETS, per user or, for anonymous requests, per IP. A
+    bucket holds up to `burst` requests and refills at `rate`, so clients can
+    burst after being idle but not keep up more than the rate.
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if request.method in SAFE_METHODS:
+            return True
+        bucket = get_buckets().get(getattr(view, 'throttle_scope', None))
+        if bucket is None:
+            return True
+
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        allowed, self.retry_after = get_token_buckets().take(BUCKET_KEY.format(view.throttle_scope, ident), *bucket)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
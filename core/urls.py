@@ -0,0 +1,9 @@
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+# djoser.urls with the throttled UserViewSet.
+router = DefaultRouter()
+router.register('users', views.UserViewSet)
+
+urlpatterns = router.urls
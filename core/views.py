@@ -1,3 +1,19 @@
-from django.shortcuts import render
+from djoser.views import UserViewSet as BaseUserViewSet
+from rest_framework_simplejwt.views import TokenObtainPairView as BaseTokenObtainPairView
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 
-# Create your views here.
+from .serializers import TokenObtainPairSerializer
+
+
+class TokenObtainPairView(BaseTokenObtainPairView):
+    # simplejwt 4.8 has no TOKEN_OBTAIN_SERIALIZER setting to swap it in.
+    serializer_class = TokenObtainPairSerializer
+    throttle_scope = 'auth'
+
+
+class TokenRefreshView(BaseTokenRefreshView):
+    throttle_scope = 'auth'
+
+
+class UserViewSet(BaseUserViewSet):
+    throttle_scope = 'auth'
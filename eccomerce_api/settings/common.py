@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     # "debug_toolbar.middleware.DebugToolbarMiddleware",
     'django.middleware.security.SecurityMiddleware',
+    'store.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     # "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.middleware.common.CommonMiddleware',
@@ -171,12 +172,36 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Caches each user's permissions until they change, see core.backends.
+AUTHENTICATION_BACKENDS = ['core.backends.CachedModelBackend']
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.TokenBucketThrottle',
+    ),
+    # Requests come through nginx, which appends the client's address to
+    # X-Forwarded-For. Anonymous throttling uses that last address, the rest
+    # of the header is up to the client.
+    'NUM_PROXIES': 1,
+}
+
+# Writes to views with one of these throttle_scopes are limited per user, or
+# per IP when anonymous, to bursts of `burst` requests refilled at `rate`,
+# see core.throttling. {scope: (rate, burst)}
+CORE_THROTTLE_BUCKETS = {
+    'cart': ('120/min', 30),
+    'orders': ('10/min', 5),
+    'reviews': ('10/hour', 3),
+    'auth': ('30/min', 10),
 }
+CORE_THROTTLE_REDIS_URL = 'redis://redis:6379/4'
+
+# Puts the customer_id claim in the tokens of core.serializers.
+CORE_CUSTOMER_ID_FUNCTION = 'store.cache.get_customer_id'
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -197,7 +222,19 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'playground.tasks.notify_customers',
         'schedule': 30,
         'args': ['Hello World'],
-    }
+    },
+    'flush_carts': {
+        'task': 'store.tasks.flush_carts',
+        'schedule': 60,
+    },
+    'delete_abandoned_carts': {
+        'task': 'store.tasks.delete_abandoned_carts',
+        'schedule': 60 * 60,
+    },
+    'place_orders': {
+        'task': 'store.tasks.place_orders',
+        'schedule': 60,
+    },
 }
 
 CACHES = {
@@ -208,4 +245,23 @@ CACHES = {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
         }
     }
-}
\ No newline at end of file
+}
+
+# 'database' or 'redis', see store.carts.
+STORE_CART_BACKEND = os.environ.get('STORE_CART_BACKEND', 'database')
+STORE_CART_REDIS_URL = 'redis://redis:6379/3'
+# Carts are deleted this many seconds after they were created, see
+# store.tasks.delete_abandoned_carts.
+STORE_ABANDONED_CART_AGE = 60 * 60 * 24 * 30
+# Orders placed with `Prefer: respond-async` are queued in this many shards,
+# each worked through by one store.tasks.place_orders at a time.
+STORE_CHECKOUT_SHARDS = 8
+STORE_CHECKOUT_BATCH_SIZE = 100
+# The longest a GET /store/checkouts/<id>/?wait= request is held open.
+STORE_CHECKOUT_MAX_WAIT = 20
+# Responses to Idempotency-Key requests are replayed for this many seconds,
+# see store.idempotency.
+STORE_IDEMPOTENCY_TIMEOUT = 60 * 60 * 24
+# Admin changelists count up to this many rows exactly and use the planner's
+# estimate past it on PostgreSQL, see store.admin.EstimatedCountPaginator.
+STORE_ADMIN_EXACT_COUNT_LIMIT = 10000
@@ -1,11 +1,117 @@
+import json
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin, messages
-from django.db.models.aggregates import Count
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
 from django.db.models.query import QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html, urlencode
 from django.urls import reverse
 from . import models
 
 
+def estimate_count(queryset):
+    """
+    The planner's estimate of how many rows the queryset has on PostgreSQL:
+    the table's reltuples when it isn't filtered, the row estimate of its
+    plan otherwise. None on other databases or when there's no estimate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            estimate = row and row[0]
+        else:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+    # reltuples is -1 for tables that were never analyzed.
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts up to STORE_ADMIN_EXACT_COUNT_LIMIT rows exactly and estimates
+    past that, instead of running COUNT(*) over a large table on every page.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > getattr(settings, 'STORE_ADMIN_EXACT_COUNT_LIMIT', 10000):
+            return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filters by a foreign key with an autocomplete select, which only loads
+    the chosen object, instead of listing every related object. The related
+    model's admin needs search_fields.
+    """
+    template = 'admin/store/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.title = field.verbose_name
+        # The widget gets its choices from the form field.
+        self.widget = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        ).widget
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'All',
+        }
+
+    def render(self):
+        return self.widget.render(self.lookup_kwarg, self.lookup_val, attrs={'id': f'id_filter_{self.lookup_kwarg}'})
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    A changelist that stays fast on large tables: estimated counts, no
+    second count of the unfiltered table, and autocomplete filters.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(list_filter, tuple) and issubclass(list_filter[1], AutocompleteFilter)
+               for list_filter in self.list_filter):
+            media += AutocompleteSelect(None, self.admin_site).media
+            media += forms.Media(js=['store/autocomplete_filter.js'], css={'all': ['store/styles.css']})
+        return media
+
+
 class InventoryFilter(admin.SimpleListFilter):
     title = 'inventory'
     parameter_name = 'inventory'
@@ -30,7 +136,7 @@ class ProductImageInline(admin.TabularInline):
 
 
 @admin.register(models.Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     autocomplete_fields = ['collection']
     prepopulated_fields = {
         'slug': ['title']
@@ -39,7 +145,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ['title', 'unit_price',
                     'inventory_status', 'collection_title']
     list_editable = ['unit_price']
-    list_filter = ['collection', 'last_update', InventoryFilter]
+    list_filter = [('collection', AutocompleteFilter), 'last_update', InventoryFilter]
     inliens = [ProductImageInline]
     list_per_page = 10
     list_select_related = ['collection']
@@ -56,7 +162,8 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description='Clear inventory')
     def clear_inventory(self, request, queryset):
-        updated_count = queryset.update(inventory=0)
+        # Moves Last-Modified, see store.conditional.
+        updated_count = queryset.update(inventory=0, last_update=timezone.now())
         self.message_user(
             request,
             f'{updated_count} products were successfully updated.',
@@ -85,18 +192,15 @@ class CollectionAdmin(admin.ModelAdmin):
             }))
         return format_html('<a href="{}">{} Products</a>', url, collection.products_count)
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            products_count=Count('products')
-        )
-
 
 @admin.register(models.Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(LargeTableAdmin):
     list_display = ['user', 'first_name', 'last_name',  'membership', 'orders']
     # list_editable = ['membership']
     list_per_page = 10
+    list_select_related = ['user']
     ordering = ['user__first_name', 'user__last_name']
+    # Served by the prefix indexes of core migration 0003.
     search_fields = ['user__first_name__istartswith', 'user__last_name__istartswith']
 
     @admin.display(ordering='user__first_name')
@@ -113,14 +217,12 @@ class CustomerAdmin(admin.ModelAdmin):
             reverse('admin:store_order_changelist')
             + '?'
             + urlencode({
-                'customer__id': str(customer.id)
+                'customer__id__exact': str(customer.id)
             }))
         return format_html('<a href="{}">{} Orders</a>', url, customer.orders_count)
 
     def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            orders_count=Count('order')
-        )
+        return super().get_queryset(request).with_orders_count()
 
 
 class OrderItemInline(admin.TabularInline):
@@ -132,10 +234,31 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(models.Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
+    actions = ['mark_complete', 'mark_failed']
     autocomplete_fields = ['customer']
     inlines = [OrderItemInline]
-    list_display = ['id', 'placed_at', 'customer']
+    list_display = ['id', 'placed_at', 'customer', 'payment_status']
+    list_filter = ['payment_status', ('customer', AutocompleteFilter)]
+    list_select_related = ['customer__user']
+
+    @admin.action(description='Mark as complete')
+    def mark_complete(self, request, queryset):
+        self.set_payment_status(request, queryset, models.Order.PAYMENT_STATUS_COMPLETE)
+
+    @admin.action(description='Mark as failed')
+    def mark_failed(self, request, queryset):
+        self.set_payment_status(request, queryset, models.Order.PAYMENT_STATUS_FAILED)
+
+    def set_payment_status(self, request, queryset, payment_status):
+        outcomes = models.Order.objects.set_payment_status(
+            queryset.values_list('pk', flat=True), payment_status)
+        updated_count = list(outcomes.values()).count('updated')
+        self.message_user(
+            request,
+            f'{updated_count} orders were successfully updated.',
+            messages.SUCCESS
+        )
 
 
 class CartItemInline(admin.TabularInline):
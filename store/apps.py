@@ -5,5 +5,11 @@ class StoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'store'
 
-    # def ready(self) -> None:
-    #     import store.signals
\ No newline at end of file
+    def ready(self) -> None:
+        # import store.signals
+        import store.cache
+        import store.search
+        import store.counters
+        import store.conditional
+        import store.carts
+        import store.rollups
\ No newline at end of file
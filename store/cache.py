@@ -0,0 +1,224 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from core.authentication import ClaimsUser, bump_perms_version
+
+from .dispatch import post_bulk_create, post_update
+from .models import Collection, Customer, Product, ProductImage, Promotion
+
+CACHE_TIMEOUT = getattr(settings, 'STORE_CACHE_TIMEOUT', 60 * 15)
+# How long a request may hold the right to rebuild an entry, and how long the
+# other requests wait for it before they rebuild it themselves.
+LOCK_TIMEOUT = getattr(settings, 'STORE_CACHE_LOCK_TIMEOUT', 10)
+LOCK_WAIT = getattr(settings, 'STORE_CACHE_LOCK_WAIT', 2)
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _version_key(name):
+    return f'store:version:{name}'
+
+
+def get_versions(*names):
+    """
+    Returns the current version of each name, in order.
+
+    A missing version is initialised with the current time in milliseconds
+    rather than 1, so an evicted counter never comes back with a value that
+    older entries were stored under.
+    """
+    keys = [_version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(names):
+    for name in names:
+        key = _version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+
+
+def bump_versions(*names):
+    """
+    Invalidates every entry stored under the given version names.
+
+    Inside a transaction the versions are bumped again on commit, so a request
+    that rebuilt an entry from the old rows before the commit doesn't keep it.
+    """
+    _bump(names)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
+
+
+def _count(stat, namespace):
+    key = f'store:cache:{stat}:{namespace}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_stats(namespace):
+    hits, misses = f'store:cache:hits:{namespace}', f'store:cache:misses:{namespace}'
+    stats = cache.get_many([hits, misses])
+    return {'hits': stats.get(hits, 0), 'misses': stats.get(misses, 0)}
+
+
+def get_or_set(key, compute, timeout=CACHE_TIMEOUT):
+    """
+    Returns (value, hit). On a miss only one caller computes the value; the
+    others wait up to LOCK_WAIT seconds for it before computing it themselves.
+
+    `compute` returns a (value, cacheable) pair so callers can skip caching
+    error responses.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                return value, True
+        value, cacheable = compute()
+        return value, False
+
+    try:
+        value, cacheable = compute()
+        if cacheable:
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value, False
+
+
+def _customer_key(user_id):
+    return f'store:customer_id:{user_id}'
+
+
+def get_customer_id(user):
+    """
+    Returns the id of the user's customer profile, or None without one. It
+    comes from the token's claims for a ClaimsUser, and is otherwise
+    remembered so order requests don't look it up every time.
+    """
+    if isinstance(user, ClaimsUser):
+        return user.customer_id
+    user_id = user.pk
+    key = _customer_key(user_id)
+    customer_id = cache.get(key)
+    if customer_id is None:
+        customer_id = Customer.objects \
+            .filter(user_id=user_id) \
+            .values_list('id', flat=True) \
+            .first()
+        # 0 stands for no profile, which cache.get() can't tell from a miss.
+        cache.set(key, customer_id or 0, CACHE_TIMEOUT)
+    return customer_id or None
+
+
+class CachedResponseMixin:
+    """
+    Caches the data of successful list and retrieve responses.
+
+    Entries are keyed by the absolute request URL and by the versions of
+    `cache_namespace`, so the receivers below invalidate them by bumping a
+    version instead of deleting keys.
+    """
+    cache_namespace = None
+    cache_timeout = CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            [self.cache_namespace, f'{self.cache_namespace}:list'],
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return self.get_cached_response(
+            [self.cache_namespace, f'{self.cache_namespace}:{pk}'],
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request, versions):
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f'store:response:{self.cache_namespace}:{"-".join(map(str, versions))}:{url}'
+
+    def get_cached_response(self, version_names, view, request, *args, **kwargs):
+        key = self.get_cache_key(request, get_versions(*version_names))
+        response = None
+
+        def compute():
+            nonlocal response
+            response = view(request, *args, **kwargs)
+            return response.data, response.status_code == 200
+
+        data, hit = get_or_set(key, compute, self.cache_timeout)
+        _count('hits' if hit else 'misses', self.cache_namespace)
+        if response is None:
+            response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    bump_versions(f'product:{instance.pk}', 'product:list', 'collection')
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_product_image(sender, instance, **kwargs):
+    bump_versions(f'product:{instance.product_id}', 'product:list')
+
+
+@receiver([post_save, post_delete], sender=Collection)
+def invalidate_collection(sender, instance, **kwargs):
+    bump_versions(f'collection:{instance.pk}', 'collection:list')
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver(m2m_changed, sender=Product.promotions.through)
+def invalidate_promotions(sender, **kwargs):
+    bump_versions('product')
+
+
+@receiver([post_update, post_bulk_create], sender=Product)
+def invalidate_products(sender, **kwargs):
+    bump_versions('product', 'collection')
+
+
+@receiver([post_update, post_bulk_create], sender=ProductImage)
+@receiver([post_update, post_bulk_create], sender=Promotion)
+def invalidate_product_rows(sender, **kwargs):
+    bump_versions('product')
+
+
+@receiver([post_update, post_bulk_create], sender=Collection)
+def invalidate_collections(sender, **kwargs):
+    bump_versions('collection')
+
+
+@receiver([post_save, post_delete], sender=Customer)
+def forget_customer_id(sender, instance, **kwargs):
+    key = _customer_key(instance.user_id)
+    cache.delete(key)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(key))
+    # The customer_id claim of the user's tokens is out of date.
+    bump_perms_version(instance.user_id)
@@ -0,0 +1,251 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+import redis
+
+from .models import Cart, CartItem, Product
+
+DATABASE_BACKEND = 'database'
+REDIS_BACKEND = 'redis'
+
+CART_KEY = 'store:cart:{}'
+DIRTY_KEY = 'store:cart:dirty'
+CREATED_AT = 'created_at'
+
+# The item scripts take the TTL and the cart id, then their own arguments.
+# Each returns nil when the cart isn't in Redis, so the caller can load it
+# from the database and try again, and 0 when the item doesn't exist.
+ADD_ITEMS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+local quantities = {}
+for i = 3, #ARGV, 2 do
+    quantities[#quantities + 1] = redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return quantities
+"""
+
+SET_ITEM = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+if redis.call('HEXISTS', KEYS[1], ARGV[3]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], ARGV[3], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return 1
+"""
+
+REMOVE_ITEM = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+if redis.call('HDEL', KEYS[1], ARGV[3]) == 0 then return 0 end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return 1
+"""
+
+# Loads a cart unless another request already did, which may have changed it.
+LOAD_CART = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+READ_CART = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def get_backend():
+    return getattr(settings, 'STORE_CART_BACKEND', DATABASE_BACKEND)
+
+
+class RedisCartStore:
+    """
+    Keeps carts in Redis hashes of {product_id: quantity} that expire
+    STORE_CART_TTL seconds after they were last used, and writes them to the
+    Cart and CartItem tables only when `persist` is called: at checkout and
+    by the flush_carts task for the carts changed since its last run.
+
+    A cart that isn't in Redis is loaded from the database, so carts survive
+    both the TTL and switching backends. An item's id is its product id.
+    """
+
+    def __init__(self, client, ttl):
+        self.client = client
+        self.ttl = ttl
+        self.scripts = {
+            name: client.register_script(script) for name, script in [
+                ('add', ADD_ITEMS), ('set', SET_ITEM), ('remove', REMOVE_ITEM),
+                ('load', LOAD_CART), ('read', READ_CART),
+            ]
+        }
+
+    @staticmethod
+    def key(cart_id):
+        return CART_KEY.format(cart_id)
+
+    @staticmethod
+    def parse(values):
+        if isinstance(values, list):
+            # HGETALL through a script comes back as a flat list.
+            values = dict(zip(values[::2], values[1::2]))
+        created_at = datetime.fromisoformat(values.pop(CREATED_AT))
+        return created_at, {int(product_id): int(quantity) for product_id, quantity in values.items()}
+
+    def create(self):
+        cart_id = uuid4()
+        created_at = timezone.now()
+        with self.client.pipeline() as pipeline:
+            pipeline.hset(self.key(cart_id), CREATED_AT, created_at.isoformat())
+            pipeline.expire(self.key(cart_id), self.ttl)
+            pipeline.sadd(DIRTY_KEY, str(cart_id))
+            pipeline.execute()
+        return cart_id, created_at
+
+    def load(self, cart_id):
+        """
+        Copies a cart from the database to Redis. Returns False if there is
+        no such cart.
+        """
+        created_at = Cart.objects.filter(pk=cart_id).values_list('created_at', flat=True).first()
+        if created_at is None:
+            return False
+        values = [CREATED_AT, created_at.isoformat()]
+        for product_id, quantity in CartItem.objects.filter(cart_id=cart_id).values_list('product_id', 'quantity'):
+            values += [product_id, quantity]
+        self.scripts['load'](keys=[self.key(cart_id)], args=[self.ttl, *values])
+        return True
+
+    def run(self, script, cart_id, *args):
+        """
+        Runs one of the item scripts, loading the cart from the database when
+        it isn't in Redis. Returns None if the cart doesn't exist.
+        """
+        keys = [self.key(cart_id), DIRTY_KEY]
+        args = [self.ttl, str(cart_id), *args]
+        result = self.scripts[script](keys=keys, args=args)
+        if result is None and self.load(cart_id):
+            result = self.scripts[script](keys=keys, args=args)
+        return result
+
+    def get(self, cart_id):
+        """Returns (created_at, {product_id: quantity}) or None."""
+        values = self.scripts['read'](keys=[self.key(cart_id)], args=[self.ttl])
+        if values is None and self.load(cart_id):
+            values = self.scripts['read'](keys=[self.key(cart_id)], args=[self.ttl])
+        if values is None:
+            return None
+        return self.parse(values)
+
+    def add_items(self, cart_id, quantities):
+        """
+        Adds {product_id: quantity} to the cart and returns the new quantities
+        in the same order, or None without the cart.
+        """
+        args = [value for item in quantities.items() for value in item]
+        return self.run('add', cart_id, *args)
+
+    def add_item(self, cart_id, product_id, quantity):
+        """Returns the new quantity of the item, or None without the cart."""
+        quantities = self.add_items(cart_id, {product_id: quantity})
+        return quantities and quantities[0]
+
+    def set_item(self, cart_id, product_id, quantity):
+        return self.run('set', cart_id, product_id, quantity)
+
+    def remove_item(self, cart_id, product_id):
+        return self.run('remove', cart_id, product_id)
+
+    def delete(self, cart_id):
+        """Returns whether the cart existed."""
+        with self.client.pipeline() as pipeline:
+            pipeline.delete(self.key(cart_id))
+            pipeline.srem(DIRTY_KEY, str(cart_id))
+            existed, _ = pipeline.execute()
+        deleted, _ = Cart.objects.filter(pk=cart_id).delete()
+        return bool(existed or deleted)
+
+    def persist(self, cart_id):
+        """
+        Writes the cart to the database, replacing its items there. Returns
+        False if the cart isn't in Redis.
+        """
+        # Take the cart off the dirty set first: a change made while it's
+        # being written adds it back for the next flush.
+        self.client.srem(DIRTY_KEY, str(cart_id))
+        values = self.client.hgetall(self.key(cart_id))
+        if not values:
+            return False
+
+        created_at, items = self.parse(values)
+        product_ids = set(Product.objects.filter(pk__in=items).values_list('pk', flat=True))
+        items = [
+            CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity)
+            for product_id, quantity in items.items() if product_id in product_ids
+        ]
+        with transaction.atomic():
+            Cart.objects.bulk_create([Cart(pk=cart_id)], ignore_conflicts=True)
+            # auto_now_add overrides the created_at given to the insert.
+            Cart.objects.filter(pk=cart_id, created_at__gt=created_at).update(created_at=created_at)
+            if connection.features.supports_update_conflicts_with_target:
+                CartItem.objects.filter(cart_id=cart_id).exclude(product_id__in=product_ids).delete()
+                CartItem.objects.bulk_create(
+                    items, update_conflicts=True,
+                    unique_fields=['cart_id', 'product_id'], update_fields=['quantity'])
+            else:
+                CartItem.objects.filter(cart_id=cart_id).delete()
+                CartItem.objects.bulk_create(items)
+        return True
+
+    def flush(self, batch_size=500):
+        """Persists every cart changed since the last flush."""
+        persisted = 0
+        while True:
+            cart_ids = self.client.spop(DIRTY_KEY, batch_size)
+            if not cart_ids:
+                return persisted
+            for cart_id in cart_ids:
+                persisted += self.persist(UUID(cart_id))
+
+
+_stores = {}
+
+
+def get_cart_store():
+    """
+    Returns the RedisCartStore when STORE_CART_BACKEND is 'redis', else None.
+    """
+    if get_backend() != REDIS_BACKEND:
+        return None
+
+    url = getattr(settings, 'STORE_CART_REDIS_URL', 'redis://redis:6379/3')
+    ttl = getattr(settings, 'STORE_CART_TTL', 60 * 60 * 24 * 7)
+    if (url, ttl) not in _stores:
+        _stores[url, ttl] = RedisCartStore(redis.Redis.from_url(url, decode_responses=True), ttl)
+    return _stores[url, ttl]
+
+
+def persist_cart(cart_id):
+    """Makes sure the database has the latest items of the cart."""
+    store = get_cart_store()
+    if store is not None:
+        store.persist(cart_id)
+
+
+@receiver(post_delete, sender=Cart)
+def forget_deleted_cart(sender, instance, **kwargs):
+    # Checked out carts are deleted from the database.
+    store = get_cart_store()
+    if store is not None:
+        # delete() clears instance.pk before the transaction commits.
+        key = store.key(instance.pk)
+        transaction.on_commit(lambda: store.client.delete(key))
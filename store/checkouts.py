@@ -0,0 +1,179 @@
+import logging
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Mod
+from rest_framework.exceptions import ValidationError
+from redis.exceptions import LockError
+
+from .cache import bump_versions
+from .carts import persist_cart
+from .models import Cart, CartItem, Checkout, Order, OrderItem, Product
+
+logger = logging.getLogger(__name__)
+
+RESULT_KEY = 'store:checkout:{}'
+LOCK_KEY = 'store:checkouts:lock:{}'
+RESULT_TIMEOUT = 60 * 10
+POLL_INTERVAL = 0.2
+
+
+def place_order(customer_id, cart_id):
+    """
+    Turns the cart into an order of the customer and deletes it. Raises
+    ValidationError when the cart is empty or a product is short on stock.
+    """
+    with transaction.atomic():
+        cartitems = CartItem.objects \
+            .filter(cart_id=cart_id) \
+            .select_related('product')
+        if not cartitems:
+            raise ValidationError({'cart_id': ['The given cart has no items']})
+
+        short = Product.objects.reserve_inventory(
+            {cartitem.product_id: cartitem.quantity for cartitem in cartitems})
+        if short:
+            titles = [cartitem.product.title for cartitem in cartitems if cartitem.product_id in short]
+            raise ValidationError({'cart_id': [f'Not enough inventory for: {", ".join(titles)}']})
+        bump_versions(*[f'product:{cartitem.product_id}' for cartitem in cartitems], 'product:list')
+
+        order = Order.objects.create(customer_id=customer_id)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=cartitem.product,
+                collection_id=cartitem.product.collection_id,
+                quantity=cartitem.quantity,
+                unit_price=cartitem.product.unit_price,
+            ) for cartitem in cartitems
+        ])
+
+        Cart.objects.get(id=cart_id).delete()
+
+        return order
+
+
+def get_shards():
+    return getattr(settings, 'STORE_CHECKOUT_SHARDS', 8)
+
+
+def get_shard(customer_id):
+    """
+    A customer's checkouts all go to one shard, and each shard is worked
+    through by one task at a time, oldest first, so they are placed in the
+    order they were made.
+    """
+    return customer_id % get_shards()
+
+
+def pending(shard):
+    return Checkout.objects \
+        .filter(status=Checkout.STATUS_PENDING) \
+        .alias(shard=Mod('customer_id', get_shards())) \
+        .filter(shard=shard)
+
+
+def complete(checkout):
+    """
+    Places the order of a pending checkout and records the outcome. Any error
+    fails the checkout, so it can't hold up the rest of its shard.
+    """
+    try:
+        persist_cart(checkout.cart_id)
+        with transaction.atomic():
+            order = place_order(checkout.customer_id, checkout.cart_id)
+            Checkout.objects \
+                .filter(pk=checkout.pk) \
+                .update(status=Checkout.STATUS_COMPLETE, order=order)
+    except ValidationError as error:
+        fail(checkout, error.detail)
+    except Cart.DoesNotExist:
+        fail(checkout, {'cart_id': ['No cart with given ID was found']})
+    except Exception:
+        logger.exception('Checkout %s failed', checkout.pk)
+        fail(checkout, {'detail': ['The order could not be placed, please try again']})
+    # Wakes up the requests waiting on the checkout.
+    cache.set(RESULT_KEY.format(checkout.pk), True, RESULT_TIMEOUT)
+
+
+def fail(checkout, errors):
+    Checkout.objects \
+        .filter(pk=checkout.pk) \
+        .update(status=Checkout.STATUS_FAILED, errors=errors)
+
+
+class CacheLock:
+    """
+    The lock of caches without django_redis's lock(), like LocMemCache. It
+    holds a token of its own so that a task whose lock expired while it worked
+    doesn't release the next task's, though not atomically.
+    """
+
+    def __init__(self, key, timeout):
+        self.key = key
+        self.timeout = timeout
+        self.token = uuid4().hex
+
+    def acquire(self, blocking=False):
+        return cache.add(self.key, self.token, self.timeout)
+
+    def release(self):
+        if cache.get(self.key) != self.token:
+            raise LockError('The lock is held by another task')
+        cache.delete(self.key)
+
+
+def get_lock(shard, timeout):
+    """
+    Returns the lock of a shard, redis-py's Lock on django_redis, which
+    releases it with a Lua script only while it still holds its token.
+    """
+    key = LOCK_KEY.format(shard)
+    if hasattr(cache, 'lock'):
+        return cache.lock(key, timeout=timeout)
+    return CacheLock(key, timeout)
+
+
+def process(shard, batch_size=100):
+    """
+    Places the pending checkouts of the shard in batches of `batch_size`,
+    unless another task is already at it. Returns how many were processed.
+    """
+    lock = get_lock(shard, getattr(settings, 'STORE_CHECKOUT_LOCK_TIMEOUT', 60 * 5))
+    processed = 0
+    while lock.acquire(blocking=False):
+        try:
+            while True:
+                batch = list(pending(shard).order_by('created_at', 'id')[:batch_size])
+                if not batch:
+                    break
+                for checkout in batch:
+                    complete(checkout)
+                processed += len(batch)
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                # It expired while the batches were placed.
+                logger.warning('The lock of checkout shard %s expired', shard)
+        # A checkout made after the last batch was read saw the lock taken,
+        # so look again now that it's released.
+        if not pending(shard).exists():
+            break
+    return processed
+
+
+def wait(checkout_id, timeout):
+    """
+    Waits up to `timeout` seconds for a checkout to be processed, without
+    querying the database.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cache.get(RESULT_KEY.format(checkout_id)):
+            return True
+        time.sleep(POLL_INTERVAL)
+    return False
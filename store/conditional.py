@@ -0,0 +1,108 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_versions
+from .models import Product, ProductImage, Promotion
+
+
+class ConditionalGetMixin:
+    """
+    Answers list requests carrying If-None-Match, and retrieve requests
+    carrying If-None-Match or If-Modified-Since, with 304 before the queryset
+    is serialized.
+
+    The ETag comes from the cache versions of `cache_namespace`, which are
+    bumped by every change to the rows. Lists of views without one use the
+    max `last_modified_field` and row count of the filtered queryset instead,
+    and have no Last-Modified: the max doesn't move when an older row is
+    updated in bulk or deleted. Retrieve uses the object's own value too.
+    """
+    last_modified_field = None
+
+    def list(self, request, *args, **kwargs):
+        parts = self.get_versions('list')
+        if not parts and self.last_modified_field:
+            stamp = self.filter_queryset(self.get_queryset()) \
+                .order_by() \
+                .aggregate(last_modified=Max(self.last_modified_field), count=Count('pk'))
+            parts = [stamp['count'], stamp['last_modified']]
+        return self.get_conditional_response(request, parts, None, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        last_modified = None
+        if self.last_modified_field:
+            try:
+                last_modified = self.get_queryset() \
+                    .filter(pk=pk) \
+                    .values_list(self.last_modified_field, flat=True) \
+                    .first()
+            except (TypeError, ValueError, ValidationError):
+                pass
+        versions = self.get_versions(pk)
+        return self.get_conditional_response(
+            request, versions, last_modified, super().retrieve, *args, **kwargs)
+
+    def get_versions(self, name):
+        namespace = getattr(self, 'cache_namespace', None)
+        if namespace is None:
+            return []
+        return get_versions(namespace, f'{namespace}:{name}')
+
+    def get_etag(self, request, parts, last_modified):
+        # The body depends on the URL and on the renderer, e.g. the browsable API.
+        key = [request.get_full_path(), request.accepted_renderer.format, last_modified, *parts]
+        return quote_etag(hashlib.md5(repr(key).encode()).hexdigest())
+
+    def get_conditional_response(self, request, parts, last_modified, view, *args, **kwargs):
+        etag = self.get_etag(request, parts, last_modified)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+def touch_products(**filters):
+    # _base_manager skips StoreQuerySet's post_update; store.cache has
+    # already invalidated these products precisely.
+    Product._base_manager.filter(**filters).update(last_update=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def touch_product_of_image(sender, instance, **kwargs):
+    touch_products(pk=instance.product_id)
+
+
+@receiver(post_save, sender=Promotion)
+def touch_promoted_products(sender, instance, created, **kwargs):
+    if not created:
+        touch_products(promotions=instance)
+
+
+@receiver(pre_delete, sender=Promotion)
+def touch_products_losing_promotion(sender, instance, **kwargs):
+    touch_products(promotions=instance)
+
+
+@receiver(m2m_changed, sender=Product.promotions.through)
+def touch_products_of_promotions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        touch_products(pk=instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        touch_products(pk__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        touch_products(promotions=instance)
@@ -0,0 +1,55 @@
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .dispatch import post_bulk_create, post_update
+from .models import Collection, Product
+
+
+def change_products_count(collection_id, delta):
+    if collection_id is not None and delta:
+        Collection.objects \
+            .filter(pk=collection_id) \
+            .update(products_count=F('products_count') + delta)
+
+
+@receiver(pre_save, sender=Product)
+def remember_collection(sender, instance, **kwargs):
+    if instance._state.adding or hasattr(instance, '_loaded_collection_id'):
+        return
+    instance._loaded_collection_id = Product.objects \
+        .filter(pk=instance.pk) \
+        .values_list('collection_id', flat=True) \
+        .first()
+
+
+@receiver(post_save, sender=Product)
+def count_saved_product(sender, instance, created, **kwargs):
+    if created:
+        change_products_count(instance.collection_id, 1)
+    else:
+        previous = getattr(instance, '_loaded_collection_id', None)
+        if previous != instance.collection_id:
+            change_products_count(previous, -1)
+            change_products_count(instance.collection_id, 1)
+    instance._loaded_collection_id = instance.collection_id
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, **kwargs):
+    change_products_count(instance.collection_id, -1)
+
+
+@receiver(post_bulk_create, sender=Product)
+def count_created_products(sender, objs, **kwargs):
+    for collection_id, count in Counter(obj.collection_id for obj in objs).items():
+        change_products_count(collection_id, count)
+
+
+@receiver(post_update, sender=Product)
+def count_moved_products(sender, fields, **kwargs):
+    # The previous collections are gone by now, so recount them all.
+    if 'collection' in fields or 'collection_id' in fields:
+        Collection.objects.recount_products()
@@ -0,0 +1,12 @@
+from django.dispatch import Signal
+
+# Sent by StoreQuerySet.update() with the `queryset` that was updated and the
+# names of the updated `fields`. QuerySet.update() bypasses the model signals.
+post_update = Signal()
+
+# Sent by StoreQuerySet.bulk_create() with the list of created `objs`.
+post_bulk_create = Signal()
+
+# Sent by OrderQuerySet.set_payment_status() once per batch with the new
+# `payment_status` and the `changed` orders as {order_id: previous_status}.
+payment_status_changed = Signal()
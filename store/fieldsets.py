@@ -0,0 +1,104 @@
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_fields(value):
+    """
+    Turns 'id,orderitems.quantity,orderitems.product.title' into
+    {'id': {}, 'orderitems': {'quantity': {}, 'product': {'title': {}}}}.
+
+    An empty dict selects the whole field.
+    """
+    tree = {}
+    for path in value.split(','):
+        names = [name.strip() for name in path.split('.')]
+        if not all(names):
+            continue
+        node = tree
+        for index, name in enumerate(names):
+            if name in node and not node[name]:
+                # The whole field is already selected.
+                break
+            if index == len(names) - 1:
+                node[name] = {}
+            else:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class FieldSelection:
+    """
+    The `fields` and `expand` a GET request asks for. Paths are dotted field
+    names from the top level serializer, e.g. 'orderitems.product'.
+
+    Without `fields` every field is selected; fields named by `expand` use
+    the serializer in the parent's `expandable_fields` instead of the default.
+    """
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = fields
+        self.expand = set(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return cls()
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get(FIELDS_PARAM)
+        expand = params.get(EXPAND_PARAM, '')
+        return cls(
+            parse_fields(fields) if fields else None,
+            [path.strip() for path in expand.split(',') if path.strip()],
+        )
+
+    def includes(self, path):
+        node = self.fields
+        for name in path.split('.'):
+            if not node:
+                return True
+            if name not in node:
+                return False
+            node = node[name]
+        return True
+
+    def expands(self, path):
+        return path in self.expand and self.includes(path)
+
+
+def join(prefix, name):
+    return f'{prefix}.{name}' if prefix else name
+
+
+class SparseFieldsMixin:
+    """
+    Drops the fields a GET request didn't ask for with `?fields=` and swaps in
+    the serializers of `expandable_fields` named by `?expand=`. Works the same
+    when the serializer is nested, using its path from the root serializer.
+
+    Writes always use every field, so validation isn't affected.
+    """
+    expandable_fields = {}
+
+    @property
+    def field_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = FieldSelection.from_request(self.context.get('request'))
+        prefix = self.field_path
+        for name, serializer_class in self.expandable_fields.items():
+            if name in fields and selection.expands(join(prefix, name)):
+                fields[name] = serializer_class(read_only=True)
+        return {
+            name: field for name, field in fields.items()
+            if selection.includes(join(prefix, name))
+        }
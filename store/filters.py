@@ -1,10 +1,42 @@
-from django_filters.rest_framework import FilterSet
-from .models import Product
+from django_filters.rest_framework import DateFromToRangeFilter, FilterSet, NumberFilter
+from .models import CollectionDailySales, Order, Product, ProductDailySales
 
 class ProductFilter(FilterSet):
+    # effective_price is annotated by ProductQuerySet.with_prices()
+    effective_price__gt = NumberFilter(field_name='effective_price', lookup_expr='gt')
+    effective_price__lt = NumberFilter(field_name='effective_price', lookup_expr='lt')
+
     class Meta:
         model = Product
         fields = {
             'collection': ['exact'],
             'unit_price': ['gt', 'lt']
-        }
\ No newline at end of file
+        }
+
+
+class OrderFilter(FilterSet):
+    # ?placed_at_after=2022-01-01&placed_at_before=2022-01-31, both inclusive.
+    placed_at = DateFromToRangeFilter()
+
+    class Meta:
+        model = Order
+        fields = {
+            'payment_status': ['exact'],
+        }
+
+
+class ProductDailySalesFilter(FilterSet):
+    # ?date_after=2022-01-01&date_before=2022-01-31, both inclusive.
+    date = DateFromToRangeFilter()
+
+    class Meta:
+        model = ProductDailySales
+        fields = ['product']
+
+
+class CollectionDailySalesFilter(FilterSet):
+    date = DateFromToRangeFilter()
+
+    class Meta:
+        model = CollectionDailySales
+        fields = ['collection']
@@ -0,0 +1,85 @@
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def get_fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_cache_key(request, key):
+    scope = f'{request.user.pk}:{request.method}:{request.path}:{key}'
+    return f'store:idempotency:{hashlib.md5(scope.encode()).hexdigest()}'
+
+
+def idempotent(view):
+    """
+    Makes a viewset action safe to retry with an Idempotency-Key header.
+
+    The first response to a key (per user and URL) is stored for
+    STORE_IDEMPOTENCY_TIMEOUT seconds and replayed as is to every retry,
+    without running the action again. A retry that arrives while the first
+    request is still running waits up to STORE_IDEMPOTENCY_WAIT seconds for
+    its response, then gets 409. Reusing a key with a different body gets
+    422.
+
+    Errors raised by the action, like validation errors, and 5xx responses
+    aren't stored: the next request with the key runs the action again.
+    """
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters long.'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = get_cache_key(request, key)
+        fingerprint = get_fingerprint(request)
+        deadline = time.monotonic() + getattr(settings, 'STORE_IDEMPOTENCY_WAIT', 10)
+        while True:
+            stored = cache.get(cache_key)
+            if stored is not None:
+                break
+            if cache.add(f'{cache_key}:lock', 1, getattr(settings, 'STORE_IDEMPOTENCY_LOCK_TIMEOUT', 60)):
+                try:
+                    response = view(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        cache.set(cache_key, {
+                            'fingerprint': fingerprint,
+                            'status': response.status_code,
+                            'data': response.data,
+                            'headers': dict(response.items()),
+                        }, getattr(settings, 'STORE_IDEMPOTENCY_TIMEOUT', 60 * 60 * 24))
+                    return response
+                finally:
+                    cache.delete(f'{cache_key}:lock')
+            if time.monotonic() >= deadline:
+                return Response(
+                    {'detail': f'A request with this {HEADER} is still being processed.'},
+                    status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+            time.sleep(POLL_INTERVAL)
+
+        if stored['fingerprint'] != fingerprint:
+            return Response(
+                {'detail': f'This {HEADER} was used with a different request.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(
+            stored['data'], status=stored['status'],
+            headers={**stored['headers'], 'Idempotent-Replayed': 'true'})
+    return wrapper
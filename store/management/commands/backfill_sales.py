@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.models import CollectionDailySales, Order, ProductDailySales
+from store.rollups import record_orders
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily product and collection sales from the completed orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--since', type=date.fromisoformat,
+            help='Only rebuild the days from this date (YYYY-MM-DD) on')
+
+    def handle(self, *args, **options):
+        batch_size, since = options['batch_size'], options['since']
+        orders = Order.objects \
+            .filter(payment_status=Order.PAYMENT_STATUS_COMPLETE) \
+            .order_by('pk') \
+            .values_list('pk', flat=True)
+        sales = [ProductDailySales.objects.all(), CollectionDailySales.objects.all()]
+        if since is not None:
+            orders = orders.filter(placed_at__date__gte=since)
+            sales = [queryset.filter(date__gte=since) for queryset in sales]
+
+        # Orders completed while this runs are recorded twice when the
+        # backfill reaches them, so run it while orders aren't being updated.
+        with transaction.atomic():
+            for queryset in sales:
+                queryset.delete()
+
+        recorded = 0
+        last_id = 0
+        while True:
+            batch = list(orders.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            record_orders(batch)
+            recorded += len(batch)
+            last_id = batch[-1]
+            self.stdout.write(f'Recorded {recorded} orders...')
+
+        self.stdout.write(self.style.SUCCESS(f'Recorded {recorded} orders.'))
@@ -0,0 +1,71 @@
+import timeit
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from store.models import Product, ProductImage
+from store.serializers import ProductRowSerializer, ProductSerializer
+
+
+def make_products(count):
+    """Builds unsaved, fully loaded products so only serialization is measured."""
+    products, rows, images = [], [], {}
+    for id in range(1, count + 1):
+        product = Product(
+            id=id, title=f'Product {id}', description='Lorem ipsum ' * 20, slug=f'product-{id}',
+            inventory=10, unit_price=Decimal('19.99'), collection_id=id % 10 + 1)
+        product.price_with_tax = Decimal('21.99')
+        product.effective_price = Decimal('19.79')
+        product_images = [ProductImage(id=id * 2 + i, product=product, image=f'store/images/{id}-{i}.jpg') for i in range(2)]
+        queryset = ProductImage.objects.none()
+        queryset._result_cache = product_images
+        queryset._prefetch_done = True
+        product._prefetched_objects_cache = {'images': queryset}
+        products.append(product)
+
+        rows.append({
+            'id': id, 'title': product.title, 'description': product.description, 'slug': product.slug,
+            'inventory': product.inventory, 'unit_price': product.unit_price,
+            'price_with_tax': product.price_with_tax, 'effective_price': product.effective_price,
+            'collection_id': product.collection_id,
+        })
+        images[id] = [(image.id, image.image.name) for image in product_images]
+    return products, rows, images
+
+
+def measure(serialize, number):
+    seconds = min(timeit.repeat(serialize, number=number, repeat=5)) / number
+    tracemalloc.start()
+    serialize()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds * 1000, peak / 1024
+
+
+class Command(BaseCommand):
+    help = 'Compares ProductSerializer with ProductRowSerializer for 10/100/1000-row pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/store/products/', HTTP_HOST='localhost'))
+        context = {'request': request}
+
+        self.stdout.write(f'{"rows":>6} {"serializer":<22} {"ms/page":>10} {"peak KiB":>10}')
+        for size in options['sizes']:
+            products, rows, images = make_products(size)
+            number = max(1, 1000 // size)
+            results = {
+                'ProductSerializer': measure(
+                    lambda: ProductSerializer(products, many=True, context=context).data, number),
+                'ProductRowSerializer': measure(
+                    lambda: ProductRowSerializer(rows, many=True, context=context, images=images).data, number),
+            }
+            for name, (ms, kib) in results.items():
+                self.stdout.write(f'{size:>6} {name:<22} {ms:>10.3f} {kib:>10.1f}')
+            speedup = results['ProductSerializer'][0] / results['ProductRowSerializer'][0]
+            self.stdout.write(f'{size:>6} {"speedup":<22} {speedup:>9.1f}x')
@@ -0,0 +1,168 @@
+import csv
+import json
+import time
+from datetime import date
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from store.models import Customer
+
+User = get_user_model()
+
+USER_FIELDS = ['email', 'first_name', 'last_name']
+# Checked up front, as a value too long fails the whole batch's INSERT.
+MAX_LENGTHS = {
+    **{field: User._meta.get_field(field).max_length for field in ['username', *USER_FIELDS]},
+    'phone': Customer._meta.get_field('phone').max_length,
+}
+MEMBERSHIPS = {choice for choice, _ in Customer.MEMBERSHIP_CHOICES}
+
+
+def read_rows(path, format):
+    """
+    Yields (line number, row) from a CSV file with a header, the rows as
+    dicts, or from a JSONL file, the rows as the lines themselves.
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        if format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(file, 1):
+                if line.strip():
+                    yield line_num, line
+
+
+def build(row):
+    """
+    Returns the unsaved (User, Customer) of a row. The password must already
+    be hashed by one of the PASSWORD_HASHERS; users without one can't log in
+    until they reset it.
+    """
+    if isinstance(row, str):
+        row = json.loads(row)
+    username = (row.get('username') or '').strip()
+    if not username:
+        raise ValueError('username is required')
+    values = {field: row.get(field) or '' for field in USER_FIELDS}
+    phone = row.get('phone') or None
+    for field, value in [('username', username), *values.items(), ('phone', phone or '')]:
+        if len(value) > MAX_LENGTHS[field]:
+            raise ValueError(f'{field} is longer than {MAX_LENGTHS[field]} characters')
+    if values['email']:
+        try:
+            validate_email(values['email'])
+        except ValidationError:
+            raise ValueError(f'invalid email {values["email"]!r}')
+
+    password = row.get('password') or None
+    if password is None:
+        password = make_password(None)
+    else:
+        try:
+            identify_hasher(password)
+        except ValueError:
+            raise ValueError('password is not hashed by any of the PASSWORD_HASHERS')
+
+    membership = row.get('membership') or Customer.MEMBERSHIP_BRONZE
+    if membership not in MEMBERSHIPS:
+        raise ValueError(f'unknown membership {membership!r}')
+    birth_date = row.get('birth_date') or None
+
+    user = User(username=username, password=password, **values)
+    customer = Customer(
+        phone=phone,
+        birth_date=birth_date and date.fromisoformat(birth_date),
+        membership=membership,
+    )
+    return user, customer
+
+
+class Command(BaseCommand):
+    help = 'Imports users and their customer profiles from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Defaults to the extension of the file')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path, batch_size = options['path'], options['batch_size']
+        format = options['format'] or path.rpartition('.')[2].lower()
+        if format not in ('csv', 'jsonl'):
+            raise CommandError('Pass --format for files not ending in .csv or .jsonl')
+
+        rows = read_rows(path, format)
+        imported = skipped = failed = 0
+        started = time.monotonic()
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+
+            built = {}
+            for line_num, row in chunk:
+                try:
+                    user, customer = build(row)
+                except (ValueError, TypeError, AttributeError) as error:
+                    self.stderr.write(f'Line {line_num}: {error}')
+                    failed += 1
+                    continue
+                if user.username in built:
+                    skipped += 1
+                    continue
+                built[user.username] = user, customer
+
+            imported_now = self.import_chunk(built)
+            imported += imported_now
+            skipped += len(built) - imported_now
+            self.stdout.write(f'Imported {imported} customers, skipped {skipped} '
+                              f'({self.get_rate(imported, started):.0f} rows/s)...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} customers in {time.monotonic() - started:.1f}s '
+            f'({self.get_rate(imported, started):.0f} rows/s), '
+            f'skipped {skipped} existing and {failed} invalid rows.'))
+
+    @staticmethod
+    def get_rate(rows, started):
+        return rows / max(time.monotonic() - started, 1e-6)
+
+    def import_chunk(self, built):
+        """
+        Creates the users whose username isn't taken yet and their customers,
+        all or none, so an interrupted import picks up where it stopped when
+        run again. Returns how many were created.
+
+        bulk_create() doesn't send post_save, so store.signals won't create a
+        second customer per user, and as the users are new there's nothing
+        cached about them to invalidate.
+        """
+        with transaction.atomic():
+            existing = User.objects \
+                .filter(username__in=built) \
+                .values_list('username', flat=True)
+            existing = set(existing)
+            new = [built[username] for username in built if username not in existing]
+            users = User.objects.bulk_create([user for user, _ in new])
+            if users and users[0].pk is None:
+                # The database doesn't return the ids of inserted rows.
+                pks = User.objects \
+                    .filter(username__in=[user.username for user in users]) \
+                    .values_list('username', 'pk')
+                pks = dict(pks)
+                for user in users:
+                    user.pk = pks[user.username]
+            for user, customer in new:
+                customer.user = user
+            Customer.objects.bulk_create([customer for _, customer in new])
+        return len(new)
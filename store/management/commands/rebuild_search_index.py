@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.cache import bump_versions
+from store.models import Product
+from store.search import is_supported, update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Backfills the product full text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stderr.write('Full text search is not supported on this database.')
+            return
+
+        batch_size = options['batch_size']
+        ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+        indexed = 0
+        last_id = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                update_search_index(batch)
+            indexed += len(batch)
+            last_id = batch[-1]
+            self.stdout.write(f'Indexed {indexed} products...')
+
+        bump_versions('product:list')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} products.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from store.models import Collection
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored products_count of every collection'
+
+    def handle(self, *args, **options):
+        updated = Collection.objects.recount_products()
+        self.stdout.write(self.style.SUCCESS(f'Recounted {updated} collections.'))
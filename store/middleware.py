@@ -0,0 +1,99 @@
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.shapes = Counter()
+        self.count = 0
+        self.time = 0.0
+        self.view = None
+        self.budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+            # Parameters are not part of `sql`, so only IN lists of different
+            # lengths need folding to give queries one shape per call site.
+            self.shapes[IN_LIST.sub('IN (...)', sql)] += 1
+
+    @property
+    def duplicates(self):
+        return {sql: count for sql, count in self.shapes.items() if count > 1}
+
+    @property
+    def exceeded(self):
+        return self.budget is not None and self.count > self.budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the number, total time and repeated shapes of the SQL queries run
+    by each request and checks them against the `query_budgets` the viewset
+    declares per action, e.g. `query_budgets = {'list': 3}`, or returns from
+    a `get_query_budgets()` classmethod when they depend on the settings.
+
+    Enabled by STORE_QUERY_BUDGET_ENABLED (defaults to DEBUG). The stats are
+    sent as X-Query-* headers and kept on `response.query_stats`; with
+    STORE_QUERY_BUDGET_RAISE a request over budget raises QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STORE_QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.raise_on_exceeded = getattr(settings, 'STORE_QUERY_BUDGET_RAISE', False)
+
+    def __call__(self, request):
+        stats = request.query_stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+
+        response.query_stats = stats
+        response['X-Query-Count'] = stats.count
+        response['X-Query-Time'] = f'{stats.time * 1000:.2f}ms'
+        response['X-Query-Duplicates'] = sum(stats.duplicates.values())
+        if stats.budget is not None:
+            response['X-Query-Budget'] = stats.budget
+        if stats.duplicates:
+            logger.warning('%s ran duplicate queries: %s', stats.view, stats.duplicates)
+        if stats.exceeded:
+            response['X-Query-Budget-Exceeded'] = 'true'
+            message = f'{stats.view} ran {stats.count} queries, its budget is {stats.budget}'
+            logger.warning(message)
+            if self.raise_on_exceeded:
+                raise QueryBudgetExceeded(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        cls = getattr(view_func, 'cls', None)
+        if cls is None:
+            return None
+
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        request.query_stats.view = f'{cls.__name__}.{action}'
+        if hasattr(cls, 'get_query_budgets'):
+            budgets = cls.get_query_budgets()
+        else:
+            budgets = getattr(cls, 'query_budgets', {})
+        request.query_stats.budget = budgets.get(action)
+        return None
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.2 on 2026-10-18 02:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_products(apps, schema_editor):
+    Collection = apps.get_model('store', 'Collection')
+    Product = apps.get_model('store', 'Product')
+    products = Product.objects \
+        .filter(collection=OuterRef('pk')) \
+        .order_by() \
+        .values('collection') \
+        .annotate(count=Count('pk')) \
+        .values('count')
+    Collection.objects.update(products_count=Coalesce(Subquery(products), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.2 on 2026-10-18 02:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_cart_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkout',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('cart_id', models.UUIDField()),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('C', 'Complete'), ('F', 'Failed')], default='P', max_length=1)),
+                ('errors', models.JSONField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkouts', to='store.customer')),
+                ('order', models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.order')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['status', 'created_at'], name='store_checkout_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.2 on 2026-10-18 02:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_checkout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('orders', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CollectionDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('orders', models.IntegerField(default=0)),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.collection')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='productdailysales',
+            index=models.Index(fields=['date'], name='store_product_sales_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productdailysales',
+            unique_together={('product', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='collectiondailysales',
+            index=models.Index(fields=['date'], name='store_coll_sales_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='collectiondailysales',
+            unique_together={('collection', 'date')},
+        ),
+    ]
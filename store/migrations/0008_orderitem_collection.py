@@ -0,0 +1,31 @@
+# Generated by Django 4.1.2 on 2026-10-18 03:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def set_collections(apps, schema_editor):
+    # The collections the products are in now, which is what the daily sales
+    # were recorded with so far.
+    OrderItem = apps.get_model('store', 'OrderItem')
+    Product = apps.get_model('store', 'Product')
+    collection = Product.objects \
+        .filter(pk=models.OuterRef('product_id')) \
+        .values('collection_id')
+    OrderItem.objects.update(collection_id=models.Subquery(collection))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_daily_sales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='collection',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.collection'),
+        ),
+        migrations.RunPython(set_collections, migrations.RunPython.noop),
+    ]
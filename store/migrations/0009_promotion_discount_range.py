@@ -0,0 +1,19 @@
+# Generated by Django 4.1.2 on 2026-10-18 03:18
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_orderitem_collection'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='promotion',
+            name='discount',
+            field=models.FloatField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)]),
+        ),
+    ]
@@ -1,33 +1,149 @@
+from collections import Counter
+from decimal import Decimal
 from uuid import uuid4
 from wsgiref.validate import validator
 
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.core.validators import MinValueValidator
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Round
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
+from .dispatch import payment_status_changed, post_bulk_create, post_update
 from .validators import validate_file_size
 
 User = get_user_model()
 
 
+class StoreQuerySet(models.QuerySet):
+    """QuerySet that reports bulk writes, which skip post_save/post_delete."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        post_update.send(sender=self.model, queryset=self, fields=list(kwargs))
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        post_bulk_create.send(sender=self.model, objs=objs)
+        return objs
+
+
 class Promotion(models.Model):
+    objects = StoreQuerySet.as_manager()
     description = models.CharField(max_length=255)
-    discount = models.FloatField()
+    # Percentage taken off the unit price, e.g. 15 for 15% off.
+    discount = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(100)])
+
+
+class CollectionQuerySet(StoreQuerySet):
+    def recount_products(self):
+        """Recomputes products_count for every collection in one UPDATE."""
+        products = Product.objects \
+            .filter(collection=OuterRef('pk')) \
+            .order_by() \
+            .values('collection') \
+            .annotate(count=Count('pk')) \
+            .values('count')
+        return self.update(products_count=Coalesce(Subquery(products), 0))
 
 
 class Collection(models.Model):
+    objects = CollectionQuerySet.as_manager()
     title = models.CharField(max_length=255)
     featured_product = models.ForeignKey(
         'Product', on_delete=models.SET_NULL, null=True, related_name='+', blank=True)
+    # Maintained by store.counters instead of a Count('products') annotation.
+    products_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self) -> str:
         return self.title
 
     class Meta:
         ordering = ['title']
+        indexes = [
+            models.Index(fields=['title'], name='store_collection_title_idx'),
+        ]
+
+
+TAX_RATE = Decimal('1.1')
+
+
+def to_price(expression):
+    return Cast(Round(expression, 2), models.DecimalField(max_digits=8, decimal_places=2))
+
+
+class ProductQuerySet(StoreQuerySet):
+    def with_prices(self):
+        """
+        Annotates `price_with_tax` and `effective_price`, the taxed unit price
+        after the product's best promotion, computed by the database as
+        decimals rounded to cents.
+        """
+        best_discount = Promotion.objects \
+            .filter(product=OuterRef('pk')) \
+            .order_by('-discount') \
+            .values('discount')[:1]
+        percent = models.DecimalField(max_digits=5, decimal_places=2)
+        discount = Coalesce(
+            Cast(Subquery(best_discount), percent),
+            Value(Decimal('0')),
+            output_field=percent,
+        )
+        # Rows saved without the validators can still be out of range.
+        discount = Least(Greatest(discount, Value(Decimal('0'))), Value(Decimal('100')), output_field=percent)
+        return self.annotate(
+            price_with_tax=to_price(F('unit_price') * Value(TAX_RATE)),
+            effective_price=to_price(
+                F('unit_price') * (Value(Decimal('100')) - discount) / Value(Decimal('100')) * Value(TAX_RATE)
+            ),
+        )
+
+    def reserve_inventory(self, quantities):
+        """
+        Takes {product_id: quantity} out of the products' inventory. Returns
+        the ids of the products without enough stock, in which case the
+        caller must roll the transaction back.
+
+        The rows are locked in id order, so concurrent checkouts of the same
+        products queue up instead of deadlocking. The UPDATE only matches rows
+        that still have the stock, which also covers databases without row
+        locks.
+
+        Like touch_products in store.conditional, the UPDATE skips
+        post_update, whose receivers would invalidate every cached product
+        and collection; the caller invalidates the reserved products.
+        """
+        if not quantities:
+            return []
+        product_ids = sorted(quantities)
+        inventory = self \
+            .select_for_update() \
+            .filter(pk__in=product_ids) \
+            .order_by('pk') \
+            .values_list('pk', 'inventory')
+        inventory = dict(inventory)
+        short = [pk for pk in product_ids if inventory.get(pk, 0) < quantities[pk]]
+        if short:
+            return short
+
+        in_stock = Q()
+        for pk in product_ids:
+            in_stock |= Q(pk=pk, inventory__gte=quantities[pk])
+        updated = self.model._base_manager.filter(in_stock).update(
+            inventory=F('inventory') - Case(
+                *[When(pk=pk, then=Value(quantities[pk])) for pk in product_ids],
+                output_field=models.IntegerField(),
+            ),
+            last_update=timezone.now(),
+        )
+        # Without row locks another checkout may have taken the stock since.
+        return [] if updated == len(product_ids) else product_ids
 
 
 class Product(models.Model):
+    objects = ProductQuerySet.as_manager()
     title = models.CharField(max_length=255)
     slug = models.SlugField()
     description = models.TextField(null=True, blank=True)
@@ -43,11 +159,27 @@ class Product(models.Model):
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets store.counters tell when a product moves to another collection.
+        # When it's deferred, store.counters looks it up before saving.
+        if 'collection_id' in field_names:
+            instance._loaded_collection_id = instance.collection_id
+        return instance
+
     class Meta:
         ordering = ['title']
+        indexes = [
+            # ProductFilter: collection with a unit_price range, ordered by price.
+            models.Index(fields=['collection', 'unit_price', 'id'], name='store_product_coll_price_idx'),
+            # The default (unit_price, id) ordering and its keyset pages.
+            models.Index(fields=['unit_price', 'id'], name='store_product_price_idx'),
+        ]
 
 
 class ProductImage(models.Model):
+    objects = StoreQuerySet.as_manager()
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(
         upload_to='store/images',
@@ -55,6 +187,21 @@ class ProductImage(models.Model):
     )
 
 
+class CustomerQuerySet(StoreQuerySet):
+    def with_orders_count(self):
+        """
+        Annotates orders_count with a correlated subquery, which unlike a
+        Count() over a join is only computed for the rows that are fetched.
+        """
+        orders = Order.objects \
+            .filter(customer=OuterRef('pk')) \
+            .order_by() \
+            .values('customer') \
+            .annotate(count=Count('pk')) \
+            .values('count')
+        return self.annotate(orders_count=Coalesce(Subquery(orders), 0))
+
+
 class Customer(models.Model):
     MEMBERSHIP_BRONZE = 'B'
     MEMBERSHIP_SILVER = 'S'
@@ -72,6 +219,8 @@ class Customer(models.Model):
         max_length=1, choices=MEMBERSHIP_CHOICES, default=MEMBERSHIP_BRONZE
     )
 
+    objects = CustomerQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name}'
 
@@ -79,7 +228,45 @@ class Customer(models.Model):
         ordering = ['user__first_name', 'user__last_name']
 
 
+# The most orders OrderViewSet.payment_status takes, one batch of
+# set_payment_status so the request stays within its query budget.
+PAYMENT_STATUS_BATCH_SIZE = 500
+
+
+class OrderQuerySet(models.QuerySet):
+    def set_payment_status(self, order_ids, payment_status, batch_size=PAYMENT_STATUS_BATCH_SIZE):
+        """
+        Moves the orders to `payment_status` with one UPDATE per batch of
+        `batch_size` ids, each in its own transaction, and sends
+        payment_status_changed once per batch. Returns {order_id: outcome}
+        with 'updated', 'unchanged' or 'not_found' for every id given.
+        """
+        outcomes = {}
+        order_ids = list(dict.fromkeys(order_ids))
+        for start in range(0, len(order_ids), batch_size):
+            batch = order_ids[start:start + batch_size]
+            with transaction.atomic(using=self.db):
+                previous = self \
+                    .select_for_update() \
+                    .filter(pk__in=batch) \
+                    .order_by('pk') \
+                    .values_list('pk', 'payment_status')
+                previous = dict(previous)
+                changed = {pk: status for pk, status in previous.items() if status != payment_status}
+                if changed:
+                    self.filter(pk__in=changed).update(payment_status=payment_status)
+                    payment_status_changed.send(
+                        sender=self.model, payment_status=payment_status, changed=changed)
+            for pk in batch:
+                if pk not in previous:
+                    outcomes[pk] = 'not_found'
+                else:
+                    outcomes[pk] = 'updated' if pk in changed else 'unchanged'
+        return outcomes
+
+
 class Order(models.Model):
+    objects = OrderQuerySet.as_manager()
     PAYMENT_STATUS_PENDING = 'P'
     PAYMENT_STATUS_COMPLETE = 'C'
     PAYMENT_STATUS_FAILED = 'F'
@@ -96,14 +283,145 @@ class Order(models.Model):
     )
     customer = models.ForeignKey(Customer, on_delete=models.PROTECT)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets store.rollups tell when an order is completed or reopened.
+        # When it's deferred, store.rollups looks it up before saving.
+        if 'payment_status' in field_names:
+            instance._loaded_payment_status = instance.payment_status
+        return instance
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'placed_at'], include=['payment_status'],
+                         name='store_order_customer_idx'),
+        ]
+
+
+class Checkout(models.Model):
+    """An order placed with `Prefer: respond-async`, see store.checkouts."""
+    STATUS_PENDING = 'P'
+    STATUS_COMPLETE = 'C'
+    STATUS_FAILED = 'F'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='checkouts')
+    # Not a foreign key: placing the order deletes the cart.
+    cart_id = models.UUIDField()
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    order = models.OneToOneField(Order, on_delete=models.SET_NULL, null=True, related_name='+')
+    errors = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The queue of pending checkouts, oldest first.
+            models.Index(fields=['status', 'created_at'], name='store_checkout_queue_idx'),
+        ]
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.PROTECT, related_name='orderitems')
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    # The product's collection when the order was placed, whose daily sales
+    # the item counts toward even after the product moves, see store.rollups.
+    collection = models.ForeignKey(
+        Collection, on_delete=models.SET_NULL, null=True, related_name='+', editable=False)
     quantity = models.PositiveSmallIntegerField()
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
 
 
+class DailySalesQuerySet(models.QuerySet):
+    def add(self, rows):
+        """
+        Adds the units, revenue and orders of each row, a dict keyed by the
+        model's field names, to the row with the same key and date, creating
+        it when missing. Negative values take an order back out.
+
+        Runs as a single INSERT ... ON CONFLICT DO UPDATE where the database
+        supports it, so concurrent updates of one day neither lose increments
+        nor fail on the unique constraint.
+        """
+        if not rows:
+            return
+        connection = connections[self.db]
+        if connection.features.supports_update_conflicts_with_target:
+            self._upsert(connection, rows)
+        else:
+            with transaction.atomic(using=self.db):
+                for row in rows:
+                    self._add(row)
+
+    def _upsert(self, connection, rows):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        key = self.model.key_field
+        totals = ['units', 'revenue', 'orders']
+        params = []
+        for row in rows:
+            params += [row[key], row['date'], *[row[total] for total in totals]]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({key}, date, units, revenue, orders) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))} '
+                f'ON CONFLICT ({key}, date) DO UPDATE SET '
+                + ', '.join(f'{total} = {table}.{total} + excluded.{total}' for total in totals),
+                params)
+
+    def _add(self, row):
+        key = {self.model.key_field: row[self.model.key_field], 'date': row['date']}
+        totals = {total: row[total] for total in ['units', 'revenue', 'orders']}
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(**key, **totals)
+        except IntegrityError:
+            if not self.filter(**key).update(**{name: F(name) + value for name, value in totals.items()}):
+                raise
+
+
+class DailySales(models.Model):
+    """
+    Sales of completed orders per day, by the day the order was placed,
+    maintained by store.rollups.
+    """
+    objects = DailySalesQuerySet.as_manager()
+    date = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ProductDailySales(DailySales):
+    key_field = 'product_id'
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = [['product', 'date']]
+        indexes = [
+            models.Index(fields=['date'], name='store_product_sales_date_idx'),
+        ]
+
+
+class CollectionDailySales(DailySales):
+    key_field = 'collection_id'
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = [['collection', 'date']]
+        indexes = [
+            models.Index(fields=['date'], name='store_coll_sales_date_idx'),
+        ]
+
+
 class Address(models.Model):
     street = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
@@ -112,12 +430,118 @@ class Address(models.Model):
     )
 
 
+class CartQuerySet(models.QuerySet):
+    def with_total_price(self):
+        """
+        Annotates `total_price`, the sum of the line totals of the cart's
+        items, or None for a cart without items.
+        """
+        totals = CartItem.objects \
+            .filter(cart=OuterRef('pk')) \
+            .order_by() \
+            .values('cart') \
+            .annotate(total=Sum(line_total())) \
+            .values('total')
+        return self.annotate(total_price=Subquery(totals, output_field=line_total().output_field))
+
+    def delete_created_before(self, before, batch_size=1000):
+        """
+        Deletes the carts created before `before`, with their items, in
+        batches of `batch_size` carts, each in its own short transaction so
+        checkouts aren't kept waiting on the locks. Returns the number of
+        rows deleted per model, like delete().
+        """
+        deleted = Counter()
+        carts = self.filter(created_at__lt=before)
+        while True:
+            cart_ids = list(carts.order_by('created_at').values_list('pk', flat=True)[:batch_size])
+            if not cart_ids:
+                return dict(deleted)
+            with transaction.atomic():
+                _, rows = carts.filter(pk__in=cart_ids).delete()
+            deleted.update(rows)
+
+
 class Cart(models.Model):
+    objects = CartQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid4)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='store_cart_created_at_idx'),
+        ]
+
+
+def line_total():
+    return ExpressionWrapper(
+        F('quantity') * F('product__unit_price'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+class CartItemQuerySet(models.QuerySet):
+    def with_total_price(self):
+        """Annotates `total_price`, the quantity times the product's unit price."""
+        return self.annotate(total_price=line_total())
+
+    def add_quantities(self, cart_id, quantities):
+        """
+        Adds {product_id: quantity} to the items of the cart, creating the
+        missing ones, and returns the resulting items in the same order.
+
+        Runs as a single INSERT ... ON CONFLICT DO UPDATE where the database
+        can return the rows, so concurrent adds of the same product neither
+        lose updates nor fail on the unique (cart, product) constraint.
+        """
+        connection = connections[self.db]
+        features = connection.features
+        if features.supports_update_conflicts_with_target and features.can_return_rows_from_bulk_insert:
+            rows = self._upsert_quantities(connection, cart_id, quantities)
+        else:
+            with transaction.atomic(using=self.db):
+                rows = [
+                    self._add_quantity(cart_id, product_id, quantity)
+                    for product_id, quantity in quantities.items()
+                ]
+
+        items = {
+            product_id: self.model.from_db(self.db, ['id', 'cart_id', 'product_id', 'quantity'],
+                                           (item_id, cart_id, product_id, quantity))
+            for item_id, product_id, quantity in rows
+        }
+        return [items[product_id] for product_id in quantities]
+
+    def _upsert_quantities(self, connection, cart_id, quantities):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        cart_id = self.model._meta.get_field('cart').get_db_prep_value(cart_id, connection)
+        params = []
+        for product_id, quantity in quantities.items():
+            params += [cart_id, product_id, quantity]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (cart_id, product_id, quantity) '
+                f'VALUES {", ".join(["(%s, %s, %s)"] * len(quantities))} '
+                'ON CONFLICT (cart_id, product_id) '
+                f'DO UPDATE SET quantity = {table}.quantity + excluded.quantity '
+                'RETURNING id, product_id, quantity',
+                params)
+            return cursor.fetchall()
+
+    def _add_quantity(self, cart_id, product_id, quantity):
+        try:
+            with transaction.atomic(using=self.db):
+                item = self.create(cart_id=cart_id, product_id=product_id, quantity=quantity)
+            return item.id, product_id, quantity
+        except IntegrityError:
+            items = self.filter(cart_id=cart_id, product_id=product_id)
+            if not items.update(quantity=F('quantity') + quantity):
+                raise
+            return items.values_list('id', 'product_id', 'quantity').get()
+
 
 class CartItem(models.Model):
+    objects = CartItemQuerySet.as_manager()
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='cartitems')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveSmallIntegerField()
@@ -132,4 +556,9 @@ class Review(models.Model):
     description = models.TextField()
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'created_at', 'id'], name='store_review_product_idx'),
+        ]
\ No newline at end of file
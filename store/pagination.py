@@ -1,5 +1,166 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class DefaultPageNumberPagination(PageNumberPagination):
-    page_size = 10
\ No newline at end of file
+    page_size = 10
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates on the values of the ordering fields of the last row instead of
+    an OFFSET, and never counts the queryset, so every page costs the same.
+
+    The ordering is taken from the queryset (e.g. as set by OrderingFilter),
+    then the view's `ordering`, then `ordering` below, and `pk` is appended as
+    a tie-breaker. Ordering fields must not be nullable.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.get_position_filter(values))
+
+        results = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = queryset.query.order_by or getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        self.pk_name = queryset.model._meta.pk.attname
+        fields = []
+        for field in ordering:
+            if not isinstance(field, str):
+                raise ImproperlyConfigured(
+                    f'{self.__class__.__name__} only supports ordering by field names.')
+            if field.lstrip('-') == queryset.model._meta.pk.name:
+                field = field.replace(field.lstrip('-'), 'pk')
+            if field.lstrip('-') not in [f.lstrip('-') for f in fields]:
+                fields.append(field)
+
+        if 'pk' not in [f.lstrip('-') for f in fields]:
+            fields.append('-pk' if fields[0].startswith('-') else 'pk')
+        return fields
+
+    def get_position_filter(self, values):
+        """
+        Builds `(a > x) OR (a = x AND b > y) OR ...` for ordering (a, b, ...).
+        """
+        conditions = []
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {f.lstrip('-'): value for f, value in zip(self.ordering[:index], values)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[index]}))
+        return reduce(or_, conditions)
+
+    def get_value(self, instance, field):
+        name = field.lstrip('-')
+        if isinstance(instance, dict):
+            # values() rows; the primary key is only there under its own name.
+            return instance[self.pk_name if name == 'pk' else name]
+        value = instance
+        for attr in name.split('__'):
+            value = getattr(value, attr)
+        return value
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            ordering, values = cursor['o'], cursor['v']
+        except (TypeError, ValueError, KeyError, UnicodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if ordering != self.ordering or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, instance):
+        values = [str(self.get_value(instance, field)) for field in self.ordering]
+        cursor = json.dumps({'o': self.ordering, 'v': values}, separators=(',', ':'))
+        return urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+
+class OptInKeysetPagination(BasePagination):
+    """
+    Uses KeysetPagination when the request has a `cursor` parameter (it can be
+    empty for the first page) and `default_class` otherwise, so existing
+    clients keep the responses they get today.
+    """
+    keyset_class = KeysetPagination
+    default_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.paginator = self.keyset_class()
+        elif self.default_class is not None:
+            self.paginator = self.default_class()
+        else:
+            self.paginator = None
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+
+class ProductPagination(OptInKeysetPagination):
+    default_class = DefaultPageNumberPagination
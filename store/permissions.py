@@ -16,5 +16,9 @@ class IsAdminOrReadOnly(BasePermission):
 
 
 class FullDjangoModelPermissions(DjangoModelPermissions):
-    def __init__(self) -> None:
-        self.perms_map['GET'] = ['%(app_label)s.view_%(model_name)s']
\ No newline at end of file
+    # A copy, so that reads through the other DjangoModelPermissions classes
+    # don't start requiring the view permission.
+    perms_map = {
+        **DjangoModelPermissions.perms_map,
+        'GET': ['%(app_label)s.view_%(model_name)s'],
+    }
\ No newline at end of file
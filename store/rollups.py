@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .dispatch import payment_status_changed
+from .models import CollectionDailySales, Order, OrderItem, Product, ProductDailySales
+
+CENTS = Decimal('0.01')
+
+
+def get_sales(order_ids, key):
+    """Sums the items of the orders by `key` and the day they were placed."""
+    return OrderItem.objects \
+        .filter(order_id__in=order_ids) \
+        .annotate(date=TruncDate('order__placed_at')) \
+        .values(key, 'date') \
+        .order_by() \
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('unit_price')),
+            orders=Count('order_id', distinct=True),
+        )
+
+
+def record_orders(order_ids, sign=1):
+    """
+    Adds the items of completed orders to the daily sales, or with a sign of
+    -1 takes them back out. Callers pass each order once per change of
+    status, e.g. when a batch of orders is completed.
+    """
+    with transaction.atomic():
+        # Items count toward the collection their product was in when the
+        # order was placed, so taking an order back out after the product
+        # moved still takes it from the right collection.
+        for model, key in [(ProductDailySales, 'product_id'), (CollectionDailySales, 'collection_id')]:
+            rows = [
+                {
+                    model.key_field: row[key],
+                    'date': row['date'],
+                    'units': sign * row['units'],
+                    # SQLite sums decimals as floats.
+                    'revenue': sign * Decimal(row['revenue']).quantize(CENTS),
+                    'orders': sign * row['orders'],
+                } for row in get_sales(order_ids, key)
+                # Items whose collection was deleted.
+                if row[key] is not None
+            ]
+            model.objects.add(rows)
+
+
+@receiver(pre_save, sender=OrderItem)
+def set_collection(sender, instance, **kwargs):
+    if instance._state.adding and instance.collection_id is None:
+        instance.collection_id = Product.objects \
+            .filter(pk=instance.product_id) \
+            .values_list('collection_id', flat=True) \
+            .first()
+
+
+@receiver(pre_save, sender=Order)
+def remember_payment_status(sender, instance, **kwargs):
+    if instance._state.adding or hasattr(instance, '_loaded_payment_status'):
+        return
+    instance._loaded_payment_status = Order.objects \
+        .filter(pk=instance.pk) \
+        .values_list('payment_status', flat=True) \
+        .first()
+
+
+@receiver(post_save, sender=Order)
+def record_completed_order(sender, instance, created, **kwargs):
+    previous = None if created else getattr(instance, '_loaded_payment_status', None)
+    complete = Order.PAYMENT_STATUS_COMPLETE
+    if previous != complete and instance.payment_status == complete:
+        record_orders([instance.pk])
+    elif previous == complete and instance.payment_status != complete:
+        record_orders([instance.pk], sign=-1)
+    instance._loaded_payment_status = instance.payment_status
+
+
+@receiver(payment_status_changed, sender=Order)
+def record_completed_orders(sender, payment_status, changed, **kwargs):
+    complete = Order.PAYMENT_STATUS_COMPLETE
+    if payment_status == complete:
+        record_orders(list(changed))
+    else:
+        reopened = [pk for pk, previous in changed.items() if previous == complete]
+        if reopened:
+            record_orders(reopened, sign=-1)
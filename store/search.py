@@ -0,0 +1,142 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .dispatch import post_bulk_create, post_update
+from .models import Product
+
+# Product.search_vector on PostgreSQL and the store_product_fts table on SQLite
+# are created by migration 0002 outside of the model state.
+FTS_TABLE = 'store_product_fts'
+SEARCH_CONFIG = 'english'
+INDEXED_FIELDS = {'title', 'description'}
+
+
+def is_supported():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _words(terms):
+    return [word for term in terms for word in re.findall(r'\w+', term)]
+
+
+def _postgres_query(words):
+    # Every word has to match; the last one is a prefix so results show up
+    # while the user is still typing it.
+    return ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+
+
+def _sqlite_query(words):
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def search(queryset, terms):
+    """
+    Filters `queryset` to the products matching every search term and
+    annotates `search_rank`, where higher is more relevant.
+    """
+    words = _words(terms)
+    if not words:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        query = _postgres_query(words)
+        matches = RawSQL(
+            'store_product.search_vector @@ to_tsquery(%s, %s)',
+            [SEARCH_CONFIG, query], output_field=BooleanField())
+        rank = RawSQL(
+            'ts_rank(store_product.search_vector, to_tsquery(%s, %s))',
+            [SEARCH_CONFIG, query], output_field=FloatField())
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    query = _sqlite_query(words)
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [query])
+    # bm25() is lower for better matches; titles weigh ten times descriptions.
+    rank = RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = store_product.id',
+        [query], output_field=FloatField())
+    return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on ProductViewSet backed by the full
+    text index. Results are ranked by relevance unless the client asks for an
+    explicit `ordering`, so it has to come after OrderingFilter.
+
+    Falls back to SearchFilter's icontains lookups on other databases.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if not is_supported():
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = search(queryset, terms)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
+
+
+def update_search_index(product_ids):
+    product_ids = list(product_ids)
+    if not product_ids or not is_supported():
+        return
+
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'UPDATE store_product SET search_vector = '
+                "setweight(to_tsvector(%s, coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector(%s, coalesce(description, '')), 'B') "
+                f'WHERE id IN ({placeholders})',
+                [SEARCH_CONFIG, SEARCH_CONFIG, *product_ids])
+        else:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, description) '
+                "SELECT id, title, coalesce(description, '') FROM store_product "
+                f'WHERE id IN ({placeholders})',
+                product_ids)
+
+
+def remove_from_search_index(product_ids):
+    product_ids = list(product_ids)
+    if not product_ids or connection.vendor != 'sqlite':
+        return
+
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or INDEXED_FIELDS & set(update_fields):
+        update_search_index([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    remove_from_search_index([instance.pk])
+
+
+@receiver(post_bulk_create, sender=Product)
+def index_created_products(sender, objs, **kwargs):
+    update_search_index(obj.pk for obj in objs if obj.pk is not None)
+
+
+@receiver(post_update, sender=Product)
+def index_updated_products(sender, queryset, fields, **kwargs):
+    if INDEXED_FIELDS & set(fields):
+        update_search_index(queryset.values_list('pk', flat=True))
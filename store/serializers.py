@@ -1,12 +1,20 @@
+from collections import defaultdict
 from decimal import Decimal
+from operator import itemgetter
 
-from django.db import transaction
+from django.urls import reverse
 
 from . import models
+from .cache import get_customer_id
+from .carts import persist_cart
+from .checkouts import place_order
+from .fieldsets import FieldSelection, SparseFieldsMixin
 from rest_framework import serializers
 
+CENTS = Decimal('0.01')
 
-class CollectionSerializer(serializers.ModelSerializer):
+
+class CollectionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Collection
         fields = ['id', 'title', 'products_count']
@@ -23,23 +31,109 @@ class ProductImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image']
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
+    expandable_fields = {'collection': CollectionSerializer}
     class Meta:
         model = models.Product
-        fields = ['id', 'title', 'description', 'slug', 'inventory', 'unit_price', 'price_with_tax', 'collection', 'images']
+        fields = ['id', 'title', 'description', 'slug', 'inventory', 'unit_price', 'price_with_tax', 'effective_price', 'collection', 'images']
 
-    price_with_tax = serializers.SerializerMethodField(method_name='calculate_tax')
+    # Annotated by ProductQuerySet.with_prices()
+    price_with_tax = serializers.DecimalField(max_digits=8, decimal_places=2, coerce_to_string=False, read_only=True)
+    effective_price = serializers.DecimalField(max_digits=8, decimal_places=2, coerce_to_string=False, read_only=True)
 
     collection = serializers.HyperlinkedRelatedField(
         queryset=models.Collection.objects.all(),
         view_name='collection-detail',
     )
 
-    def calculate_tax(self, product):
-        return product.unit_price * Decimal(1.1)
 
-   
+class ProductRowSerializer:
+    """
+    Read-only twin of ProductSerializer for list and retrieve responses.
+
+    Serializes values() rows instead of model instances: images are loaded
+    with one values_list() query for the whole page and the collection URL is
+    reversed once per request. The output must stay identical to
+    ProductSerializer's, including for `?fields=`.
+    """
+    value_fields = ['id', 'title', 'description', 'slug', 'inventory', 'unit_price',
+                    'price_with_tax', 'effective_price', 'collection_id']
+
+    unit_price = serializers.DecimalField(max_digits=6, decimal_places=2)
+    price_with_tax = serializers.DecimalField(max_digits=8, decimal_places=2, coerce_to_string=False)
+    effective_price = serializers.DecimalField(max_digits=8, decimal_places=2, coerce_to_string=False)
+
+    def __init__(self, instance=None, many=False, context=None, images=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        # {product_id: [(image_id, image_name), ...]}, loaded when not given.
+        self.images = images
+
+    @classmethod
+    def get_value_fields(cls, selection):
+        # The id is needed for the images and the keyset cursor either way.
+        return ['id'] + [
+            field for field in cls.value_fields[1:]
+            if selection.includes(field.removesuffix('_id'))
+        ]
+
+    @staticmethod
+    def load_images(product_ids):
+        images = defaultdict(list)
+        rows = models.ProductImage.objects \
+            .filter(product_id__in=product_ids) \
+            .values_list('product_id', 'id', 'image')
+        for product_id, image_id, name in rows:
+            images[product_id].append((image_id, name))
+        return images
+
+    @property
+    def data(self):
+        rows = list(self.instance) if self.many else [self.instance]
+        request = self.context['request']
+        selection = FieldSelection.from_request(request)
+
+        images = self.images
+        if images is None and selection.includes('images'):
+            images = self.load_images([row['id'] for row in rows])
+
+        prefix, _, suffix = request.build_absolute_uri(
+            reverse('collection-detail', kwargs={'pk': 0})).rpartition('/0/')
+        storage = models.ProductImage._meta.get_field('image').storage
+
+        def image_url(name):
+            if not name:
+                return None
+            return request.build_absolute_uri(storage.url(name))
+
+        def collection_url(collection_id):
+            if collection_id is None:
+                return None
+            return f'{prefix}/{collection_id}/{suffix}'
+
+        converters = {
+            'id': itemgetter('id'),
+            'title': itemgetter('title'),
+            'description': itemgetter('description'),
+            'slug': itemgetter('slug'),
+            'inventory': itemgetter('inventory'),
+            'unit_price': lambda row: self.unit_price.to_representation(row['unit_price']),
+            'price_with_tax': lambda row: self.price_with_tax.to_representation(row['price_with_tax']),
+            'effective_price': lambda row: self.effective_price.to_representation(row['effective_price']),
+            'collection': lambda row: collection_url(row['collection_id']),
+            'images': lambda row: [
+                {'id': image_id, 'image': image_url(name)}
+                for image_id, name in images.get(row['id'], [])
+            ],
+        }
+        converters = [(name, convert) for name, convert in converters.items() if selection.includes(name)]
+
+        data = [{name: convert(row) for name, convert in converters} for row in rows]
+        return data if self.many else data[0]
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Review
@@ -49,31 +143,34 @@ class ReviewSerializer(serializers.ModelSerializer):
         return models.Review.objects.create(product_id=self.context['product_id'], **validated_data)
 
 
-class SimpleProductSerializer(serializers.ModelSerializer):
+class SimpleProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Product
         fields = ['id', 'title', 'unit_price']
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product = SimpleProductSerializer()
-    total_price = serializers.SerializerMethodField()
-
-    def get_total_price(self, cart_item):
-        return cart_item.product.unit_price * cart_item.quantity
+    # Annotated by CartItemQuerySet.with_total_price()
+    total_price = serializers.DecimalField(max_digits=None, decimal_places=2, coerce_to_string=False, read_only=True)
+    expandable_fields = {'product': ProductSerializer}
 
     class Meta:
         model = models.CartItem
         fields = ['id', 'product', 'quantity', 'total_price']
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # id = serializers.UUIDField(read_only=True)
     cartitems = CartItemSerializer(many=True, read_only=True)
     total_price = serializers.SerializerMethodField()
 
     def get_total_price(self, cart):
-        return sum([item.product.unit_price * item.quantity for item in cart.cartitems.all()])
+        # Annotated by CartQuerySet.with_total_price(), None without items.
+        if cart.total_price is None:
+            return 0
+        # SQLite sums decimals as floats.
+        return cart.total_price.quantize(CENTS)
 
     class Meta:
         model = models.Cart
@@ -87,14 +184,7 @@ class AddCartItemSerializer(serializers.ModelSerializer):
     def save(self, **kwargs):
         product = self.validated_data['product']
         quantity = self.validated_data['quantity']
-        cart_id = self.context['cart_id']
-        try:
-            cart_item = models.CartItem.objects.get(product=product, cart_id=cart_id)
-            cart_item.quantity += quantity
-            cart_item.save()
-            self.instance = cart_item
-        except models.CartItem.DoesNotExist:
-            self.instance = models.CartItem.objects.create(**self.validated_data, cart_id=cart_id)
+        [self.instance] = models.CartItem.objects.add_quantities(self.context['cart_id'], {product.id: quantity})
         return self.instance
         
     class Meta:
@@ -102,13 +192,47 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'quantity']
 
 
+class BulkAddCartItemListSerializer(serializers.ListSerializer):
+    def validate(self, items):
+        product_ids = {item['product'] for item in items}
+        found = set(models.Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
+        missing = sorted(product_ids - found)
+        if missing:
+            raise serializers.ValidationError(f'Invalid product ids: {", ".join(map(str, missing))}.')
+        return items
+
+    def get_quantities(self):
+        # The same product may be listed more than once.
+        quantities = {}
+        for item in self.validated_data:
+            quantities[item['product']] = quantities.get(item['product'], 0) + item['quantity']
+        return quantities
+
+    def save(self, **kwargs):
+        self.instance = models.CartItem.objects.add_quantities(self.context['cart_id'], self.get_quantities())
+        return self.instance
+
+
+class BulkAddCartItemSerializer(serializers.ModelSerializer):
+    """
+    One item of POST /carts/{id}/items/bulk/. Product ids are checked for the
+    whole list in one query.
+    """
+    product = serializers.IntegerField()
+
+    class Meta:
+        model = models.CartItem
+        fields = ['product', 'quantity']
+        list_serializer_class = BulkAddCartItemListSerializer
+
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.CartItem
         fields = ['quantity']
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Customer
         fields = ['id', 'user', 'phone', 'birth_date', 'membership']
@@ -123,15 +247,17 @@ class CreateUserCustomerSerializer(serializers.ModelSerializer):
         return models.Customer.objects.create(user=self.context['user'], **validated_data)
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product = SimpleProductSerializer()
+    expandable_fields = {'product': ProductSerializer}
     class Meta:
         model = models.OrderItem
         fields = ['id', 'product', 'quantity', 'unit_price']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     orderitems = OrderItemSerializer(many=True, read_only=True)
+    expandable_fields = {'customer': CustomerSerializer}
     class Meta:
         model = models.Order
         fields = ['id', 'customer', 'placed_at', 'payment_status', 'orderitems']
@@ -143,10 +269,22 @@ class UpdateOrderSerializer(serializers.ModelSerializer):
         fields = ['payment_status']
 
 
+class BulkUpdateOrderSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=models.PAYMENT_STATUS_BATCH_SIZE)
+    payment_status = serializers.ChoiceField(choices=models.Order.PAYMENT_STATUS_CHOICES)
+
+    def save(self, **kwargs):
+        outcomes = models.Order.objects.set_payment_status(
+            self.validated_data['order_ids'], self.validated_data['payment_status'])
+        return [{'id': pk, 'outcome': outcome} for pk, outcome in outcomes.items()]
+
+
 class CreateOrderSerializer(serializers.Serializer):
     cart_id = serializers.UUIDField()
 
     def validate_cart_id(self, cart_id):
+        persist_cart(cart_id)
         if not models.Cart.objects.filter(id=cart_id).exists():
             raise serializers.ValidationError('No cart with given ID was found')
 
@@ -154,24 +292,29 @@ class CreateOrderSerializer(serializers.Serializer):
             raise serializers.ValidationError('The given cart has no items')
         return cart_id
 
+    def validate(self, attrs):
+        attrs['customer_id'] = get_customer_id(self.context['user'])
+        if attrs['customer_id'] is None:
+            raise serializers.ValidationError('Create your customer profile first')
+        return attrs
+
     def save(self, **kwargs):
-        with transaction.atomic():
-            customer = models.Customer.objects.get(user=self.context['user'])
-            order = models.Order.objects.create(customer=customer)
+        return place_order(self.validated_data['customer_id'], self.validated_data['cart_id'])
+
 
-            cartitems = models.CartItem.objects.filter(cart_id=self.validated_data['cart_id'])
+class CheckoutSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Checkout
+        fields = ['id', 'cart_id', 'status', 'order', 'errors', 'created_at']
 
-            orderitems = [
-                models.OrderItem(
-                    order=order,
-                    product=cartitem.product,
-                    quantity=cartitem.quantity,
-                    unit_price=cartitem.product.unit_price,
-                ) for cartitem in cartitems
-            ]
 
-            models.OrderItem.objects.bulk_create(orderitems)
+class ProductDailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.ProductDailySales
+        fields = ['product', 'date', 'units', 'revenue', 'orders']
 
-            models.Cart.objects.get(id=self.validated_data['cart_id']).delete()
 
-            return order
\ No newline at end of file
+class CollectionDailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.CollectionDailySales
+        fields = ['collection', 'date', 'units', 'revenue', 'orders']
@@ -0,0 +1,17 @@
+'use strict';
+{
+    // Applies a store.admin.AutocompleteFilter as soon as an option is picked.
+    const $ = django.jQuery;
+    $(document).ready(function() {
+        $('.store-autocomplete-filter select').on('change', function() {
+            const params = new URLSearchParams(window.location.search);
+            params.delete('p');
+            if (this.value) {
+                params.set(this.name, this.value);
+            } else {
+                params.delete(this.name);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
@@ -0,0 +1,45 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from . import checkouts
+from .carts import get_cart_store
+from .models import Cart
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_carts():
+    """Writes the carts changed in Redis since the last run to the database."""
+    store = get_cart_store()
+    if store is None:
+        return 0
+    return store.flush()
+
+
+@shared_task
+def delete_abandoned_carts():
+    """
+    Deletes the carts created more than STORE_ABANDONED_CART_AGE seconds ago
+    and returns the number of rows deleted per model.
+    """
+    age = getattr(settings, 'STORE_ABANDONED_CART_AGE', 60 * 60 * 24 * 30)
+    batch_size = getattr(settings, 'STORE_ABANDONED_CART_BATCH_SIZE', 1000)
+    deleted = Cart.objects.delete_created_before(timezone.now() - timedelta(seconds=age), batch_size)
+    logger.info('Deleted abandoned carts: %s', deleted)
+    return deleted
+
+
+@shared_task
+def place_orders(shard=None):
+    """
+    Places the pending checkouts of one shard, or of every shard when beat
+    runs it to pick up anything a failed task left behind.
+    """
+    batch_size = getattr(settings, 'STORE_CHECKOUT_BATCH_SIZE', 100)
+    shards = range(checkouts.get_shards()) if shard is None else [shard]
+    return sum(checkouts.process(shard, batch_size) for shard in shards)
@@ -1,7 +1,45 @@
+from django.core.cache import cache
 from rest_framework.test import APIClient
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    settings.STORE_QUERY_BUDGET_ENABLED = True
+    settings.STORE_QUERY_BUDGET_RAISE = True
+
+
+@pytest.fixture
+def query_budget():
+    """Returns a check that the response stayed within its declared query budget."""
+    def check(response):
+        stats = response.query_stats
+        assert stats.budget is not None, f'{stats.view} declares no query budget'
+        assert stats.count <= stats.budget, \
+            f'{stats.view} ran {stats.count} queries, its budget is {stats.budget}'
+        assert not stats.duplicates, f'{stats.view} ran duplicate queries: {stats.duplicates}'
+        return stats
+    return check
+
+
 @pytest.fixture
 def api_client():
-    return APIClient()
\ No newline at end of file
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(settings):
+    # See test_throttling for the throttles themselves.
+    settings.CORE_THROTTLE_BUCKETS = {}
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+from model_bakery import baker
+
+from store import models
+from store.tasks import delete_abandoned_carts
+
+
+@pytest.fixture
+def carts():
+    old = baker.make(models.Cart, _quantity=3)
+    new = baker.make(models.Cart)
+    for cart in [*old, new]:
+        baker.make(models.CartItem, cart=cart, quantity=1)
+    models.Cart.objects \
+        .filter(pk__in=[cart.pk for cart in old]) \
+        .update(created_at=timezone.now() - timedelta(days=31))
+    return old, new
+
+
+@pytest.mark.django_db
+class TestDeleteAbandonedCarts:
+    def test_deletes_old_carts_in_batches(self, carts):
+        _, new = carts
+        before = timezone.now() - timedelta(days=30)
+
+        with CaptureQueriesContext(connection) as context:
+            deleted = models.Cart.objects.delete_created_before(before, batch_size=2)
+
+        batches = [query for query in context.captured_queries if query['sql'].endswith('LIMIT 2')]
+        assert len(batches) == 3
+
+        assert deleted == {'store.Cart': 3, 'store.CartItem': 3}
+        assert list(models.Cart.objects.values_list('pk', flat=True)) == [new.pk]
+        assert models.CartItem.objects.get().cart_id == new.pk
+
+    def test_task_uses_the_configured_age(self, carts, settings):
+        settings.STORE_ABANDONED_CART_AGE = 60 * 60 * 24 * 60
+
+        assert delete_abandoned_carts() == {}
+
+        settings.STORE_ABANDONED_CART_AGE = 60 * 60 * 24 * 30
+
+        assert delete_abandoned_carts() == {'store.Cart': 3, 'store.CartItem': 3}
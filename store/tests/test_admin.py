@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+from model_bakery import baker
+
+from store import admin, models
+
+User = get_user_model()
+
+
+@pytest.fixture
+def customers():
+    customers = [
+        baker.make(models.Customer, user=baker.make(User, first_name=name))
+        for name in ['John', 'Jane', 'Joe', 'Mary', 'Mark']
+    ]
+    baker.make(models.Order, customer=customers[0], _quantity=3)
+    return customers
+
+
+@pytest.mark.django_db
+class TestAdminChangelists:
+    def test_customers_are_listed_with_their_orders_count(self, admin_client, customers):
+        admin_client.get('/admin/store/customer/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get('/admin/store/customer/')
+
+        assert response.status_code == 200
+        counts = {customer.pk: customer.orders_count for customer in response.context['cl'].result_list}
+        assert counts[customers[0].pk] == 3
+        assert counts[customers[1].pk] == 0
+        # Session, user, count and page, whatever the number of customers.
+        assert len(context.captured_queries) <= 5
+
+    def test_customer_search_uses_the_prefix_indexes(self, admin_client, customers):
+        response = admin_client.get('/admin/store/customer/', {'q': 'jo'})
+
+        assert response.status_code == 200
+        assert {customer.user.first_name for customer in response.context['cl'].result_list} == {'John', 'Joe'}
+        if connection.vendor == 'sqlite':
+            queryset = User.objects.filter(first_name__istartswith='jo')
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            assert 'core_user_first_name_prefix_idx' in plan
+
+    def test_products_are_filtered_by_collection_with_autocomplete(self, admin_client):
+        collections = baker.make(models.Collection, _quantity=2)
+        product = baker.make(models.Product, collection=collections[0])
+        baker.make(models.Product, collection=collections[1])
+
+        response = admin_client.get('/admin/store/product/', {'collection__id__exact': collections[0].pk})
+
+        assert response.status_code == 200
+        assert list(response.context['cl'].result_list) == [product]
+        assert 'store-autocomplete-filter' in response.content.decode()
+        assert 'store/autocomplete_filter.js' in response.content.decode()
+
+    def test_large_tables_are_counted_from_estimates(self, monkeypatch, customers):
+        queryset = models.Customer.objects.order_by('pk')
+        assert admin.EstimatedCountPaginator(queryset, 10).count == 5
+
+        monkeypatch.setattr(admin, 'estimate_count', lambda queryset: 2000000)
+        assert admin.EstimatedCountPaginator(queryset, 10).count == 2000000
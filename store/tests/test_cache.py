@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store.cache import get_stats
+from store.checkouts import place_order
+from store.models import Cart, CartItem, Collection, Customer, Product, ProductImage, Promotion
+
+User = get_user_model()
+
+
+@pytest.fixture
+def product():
+    collection = baker.make(Collection)
+    return baker.make(Product, collection=collection, unit_price=10, inventory=20)
+
+
+@pytest.mark.django_db
+class TestProductCache:
+    def test_second_read_is_a_hit(self, api_client, product):
+        first = api_client.get(f'/store/products/{product.id}/')
+        second = api_client.get(f'/store/products/{product.id}/')
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.data == first.data
+        assert get_stats('product') == {'hits': 1, 'misses': 1}
+
+    def test_save_invalidates_detail_and_list(self, api_client, product):
+        api_client.get(f'/store/products/{product.id}/')
+        api_client.get('/store/products/')
+
+        product.title = 'changed'
+        product.save()
+
+        detail = api_client.get(f'/store/products/{product.id}/')
+        listing = api_client.get('/store/products/')
+        assert detail['X-Cache'] == 'MISS'
+        assert detail.data['title'] == 'changed'
+        assert listing['X-Cache'] == 'MISS'
+
+    def test_save_leaves_other_products_cached(self, api_client, product):
+        other = baker.make(Product, collection=product.collection, unit_price=10, inventory=1)
+        api_client.get(f'/store/products/{other.id}/')
+
+        product.save()
+
+        assert api_client.get(f'/store/products/{other.id}/')['X-Cache'] == 'HIT'
+
+    def test_queryset_update_invalidates(self, api_client, product):
+        api_client.get(f'/store/products/{product.id}/')
+
+        Product.objects.filter(id=product.id).update(inventory=0)
+
+        response = api_client.get(f'/store/products/{product.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['inventory'] == 0
+
+    def test_orders_invalidate_only_the_ordered_products(self, api_client, product):
+        other = baker.make(Product, collection=product.collection, unit_price=10, inventory=1)
+        for url in [f'/store/products/{product.id}/', f'/store/products/{other.id}/',
+                    f'/store/collections/{product.collection_id}/']:
+            api_client.get(url)
+        cart = baker.make(Cart)
+        baker.make(CartItem, cart=cart, product=product, quantity=2)
+
+        place_order(baker.make(Customer).id, cart.id)
+
+        response = api_client.get(f'/store/products/{product.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['inventory'] == 18
+        assert api_client.get(f'/store/products/{other.id}/')['X-Cache'] == 'HIT'
+        assert api_client.get(f'/store/collections/{product.collection_id}/')['X-Cache'] == 'HIT'
+
+    def test_image_and_promotion_changes_invalidate(self, api_client, product):
+        api_client.get(f'/store/products/{product.id}/')
+        baker.make(ProductImage, product=product)
+        assert api_client.get(f'/store/products/{product.id}/')['X-Cache'] == 'MISS'
+
+        product.promotions.add(baker.make(Promotion, discount=10))
+        assert api_client.get(f'/store/products/{product.id}/')['X-Cache'] == 'MISS'
+
+    def test_not_found_is_not_cached(self, api_client):
+        api_client.get('/store/products/999/')
+        response = api_client.get('/store/products/999/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert get_stats('product')['hits'] == 0
+
+
+@pytest.mark.django_db
+class TestCollectionCache:
+    def test_product_changes_invalidate_products_count(self, api_client, product):
+        collection = product.collection
+        api_client.get(f'/store/collections/{collection.id}/')
+
+        baker.make(Product, collection=collection)
+        response = api_client.get(f'/store/collections/{collection.id}/')
+
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['products_count'] == 2
+
+    def test_writes_are_not_served_from_cache(self, api_client, product):
+        collection = product.collection
+        api_client.get('/store/collections/')
+        api_client.force_authenticate(user=User(is_staff=True, is_superuser=True, id=99999))
+
+        api_client.put(f'/store/collections/{collection.id}/', {'title': 'b'})
+        response = api_client.get('/store/collections/')
+
+        assert response['X-Cache'] == 'MISS'
+        assert response.data[0]['title'] == 'b'
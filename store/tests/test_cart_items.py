@@ -0,0 +1,106 @@
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store.models import Cart, CartItem, Product
+
+
+@pytest.fixture
+def cart():
+    return baker.make(Cart)
+
+
+@pytest.fixture
+def products():
+    return baker.make(Product, unit_price=10, _quantity=3)
+
+
+@pytest.mark.django_db
+class TestAddCartItem:
+    def test_adds_to_the_existing_item(self, api_client, cart, products, django_assert_num_queries):
+        api_client.post(f'/store/carts/{cart.id}/items/', {'product': products[0].id, 'quantity': 2})
+
+        # One query validates the product, one upserts the item.
+        with django_assert_num_queries(2):
+            response = api_client.post(f'/store/carts/{cart.id}/items/', {'product': products[0].id, 'quantity': 3})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        item = CartItem.objects.get()
+        assert response.data == {'id': item.id, 'product': products[0].id, 'quantity': 5}
+        assert item.quantity == 5
+
+    def test_fallback_without_upsert(self, cart, products):
+        first = CartItem.objects.all()._add_quantity(cart.id, products[0].id, 2)
+        second = CartItem.objects.all()._add_quantity(cart.id, products[0].id, 3)
+
+        assert second == (first[0], products[0].id, 5)
+
+
+@pytest.mark.django_db
+class TestBulkAddCartItems:
+    def test_adds_every_product_in_one_statement(self, api_client, cart, products, django_assert_num_queries):
+        baker.make(CartItem, cart=cart, product=products[0], quantity=1)
+        data = [
+            {'product': products[0].id, 'quantity': 2},
+            {'product': products[1].id, 'quantity': 3},
+            {'product': products[1].id, 'quantity': 1},
+        ]
+
+        with django_assert_num_queries(2):
+            response = api_client.post(f'/store/carts/{cart.id}/items/bulk/', data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [(item['product'], item['quantity']) for item in response.data] == \
+            [(products[0].id, 3), (products[1].id, 4)]
+        assert dict(CartItem.objects.values_list('product_id', 'quantity')) == \
+            {products[0].id: 3, products[1].id: 4}
+
+    def test_invalid_products_are_rejected_together(self, api_client, cart, products, django_assert_num_queries):
+        data = [{'product': products[0].id, 'quantity': 1}, {'product': 0, 'quantity': 1}, {'product': -5, 'quantity': 1}]
+
+        with django_assert_num_queries(1):
+            response = api_client.post(f'/store/carts/{cart.id}/items/bulk/', data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert '-5, 0' in str(response.data)
+        assert not CartItem.objects.exists()
+
+    def test_empty_list_is_rejected(self, api_client, cart):
+        response = api_client.post(f'/store/carts/{cart.id}/items/bulk/', [], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCartTotals:
+    def test_empty_cart_total_is_zero(self, api_client, cart):
+        response = api_client.get(f'/store/carts/{cart.id}/')
+
+        assert response.data['total_price'] == 0
+        assert type(response.data['total_price']) is int
+        assert b'"total_price":0}' in response.content
+
+    def test_totals_match_python_arithmetic(self, api_client, cart):
+        prices_and_quantities = [('19.99', 3), ('5.50', 2), ('0.01', 7)]
+        for price, quantity in prices_and_quantities:
+            baker.make(CartItem, cart=cart, product=baker.make(Product, unit_price=price), quantity=quantity)
+        items = CartItem.objects.filter(cart=cart).select_related('product').order_by('id')
+        line_totals = [item.product.unit_price * item.quantity for item in items]
+
+        response = api_client.get(f'/store/carts/{cart.id}/')
+
+        assert [item['total_price'] for item in response.data['cartitems']] == line_totals
+        assert [str(item['total_price']) for item in response.data['cartitems']] == ['59.97', '11.00', '0.07']
+        assert response.data['total_price'] == sum(line_totals)
+        assert str(response.data['total_price']) == '71.04'
+
+        response = api_client.get(f'/store/carts/{cart.id}/items/')
+        assert [item['total_price'] for item in response.data] == line_totals
+
+    def test_total_without_loading_products(self, api_client, cart, products, django_assert_num_queries):
+        baker.make(CartItem, cart=cart, product=products[0], quantity=2)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(f'/store/carts/{cart.id}/?fields=total_price')
+
+        assert response.data == {'total_price': 20}
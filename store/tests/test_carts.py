@@ -0,0 +1,154 @@
+import os
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+import pytest
+import redis
+from model_bakery import baker
+
+from store import models
+from store.carts import DIRTY_KEY, get_cart_store
+from store.views import RedisCartItemViewSet, RedisCartViewSet
+
+REDIS_URL = os.environ.get('STORE_TEST_REDIS_URL', 'redis://localhost:6379/15')
+
+cart_view = RedisCartViewSet.as_view({'post': 'create', 'get': 'retrieve', 'delete': 'destroy'})
+items_view = RedisCartItemViewSet.as_view({'get': 'list', 'post': 'create'})
+bulk_view = RedisCartItemViewSet.as_view({'post': 'bulk'})
+item_view = RedisCartItemViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'})
+
+
+@pytest.fixture
+def store(settings):
+    settings.STORE_CART_BACKEND = 'redis'
+    settings.STORE_CART_REDIS_URL = REDIS_URL
+    store = get_cart_store()
+    try:
+        store.client.flushdb()
+    except redis.ConnectionError:
+        pytest.skip(f'Redis is not available at {REDIS_URL}')
+    yield store
+    store.client.flushdb()
+
+
+@pytest.fixture
+def products():
+    return baker.make(models.Product, unit_price=10, inventory=10, _quantity=2)
+
+
+def call(view, method, data=None, **kwargs):
+    request = getattr(APIRequestFactory(), method)('/', data, format='json')
+    return view(request, **kwargs)
+
+
+@pytest.mark.django_db
+class TestRedisCartStore:
+    def test_items_live_in_redis_until_persisted(self, store, products):
+        cart_id, _ = store.create()
+        store.add_item(cart_id, products[0].id, 2)
+        store.add_item(cart_id, products[0].id, 3)
+        store.add_item(cart_id, products[1].id, 1)
+        store.set_item(cart_id, products[1].id, 4)
+
+        assert store.get(cart_id)[1] == {products[0].id: 5, products[1].id: 4}
+        assert not models.Cart.objects.exists()
+
+        assert store.persist(cart_id)
+        assert dict(models.CartItem.objects.values_list('product_id', 'quantity')) == \
+            {products[0].id: 5, products[1].id: 4}
+
+        store.remove_item(cart_id, products[1].id)
+        store.persist(cart_id)
+        assert list(models.CartItem.objects.values_list('product_id', flat=True)) == [products[0].id]
+
+    def test_flush_persists_changed_carts(self, store, products):
+        first, _ = store.create()
+        second, _ = store.create()
+        store.add_item(first, products[0].id, 1)
+
+        assert store.flush() == 2
+        assert models.Cart.objects.count() == 2
+        assert not store.client.smembers(DIRTY_KEY)
+        assert store.flush() == 0
+
+    def test_missing_cart_is_loaded_from_the_database(self, store, products):
+        cart = baker.make(models.Cart)
+        baker.make(models.CartItem, cart=cart, product=products[0], quantity=3)
+
+        assert store.add_item(cart.id, products[0].id, 1) == 4
+        assert store.get(cart.id)[1] == {products[0].id: 4}
+
+    def test_unknown_cart(self, store, products):
+        cart = baker.prepare(models.Cart)
+
+        assert store.get(cart.id) is None
+        assert store.add_item(cart.id, products[0].id, 1) is None
+        assert not store.client.exists(store.key(cart.id))
+
+
+@pytest.mark.django_db
+class TestRedisCartViews:
+    def test_same_contract_as_the_database_carts(self, store, products, api_client):
+        response = call(cart_view, 'post')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['cartitems'] == [] and response.data['total_price'] == 0
+        cart_id = response.data['id']
+
+        response = call(items_view, 'post', {'product': products[0].id, 'quantity': 2}, cart_pk=cart_id)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data == {'id': products[0].id, 'product': products[0].id, 'quantity': 2}
+
+        response = call(item_view, 'patch', {'quantity': 3}, cart_pk=cart_id, pk=str(products[0].id))
+        assert response.data == {'quantity': 3}
+
+        store.persist(cart_id)
+        # The URLconf serves the database carts.
+        expected = api_client.get(f'/store/carts/{cart_id}/').data
+        expected['cartitems'][0]['id'] = products[0].id
+
+        response = call(cart_view, 'get', pk=cart_id)
+        assert response.data == expected
+
+    def test_bulk_add(self, store, products):
+        cart_id, _ = store.create()
+        store.add_item(cart_id, products[0].id, 1)
+        data = [{'product': products[0].id, 'quantity': 2}, {'product': products[1].id, 'quantity': 3}]
+
+        response = call(bulk_view, 'post', data, cart_pk=str(cart_id))
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [(item['product'], item['quantity']) for item in response.data] == \
+            [(products[0].id, 3), (products[1].id, 3)]
+        assert not models.CartItem.objects.exists()
+
+    def test_not_found(self, store, products):
+        cart_id, _ = store.create()
+
+        assert call(cart_view, 'get', pk='nope').status_code == status.HTTP_404_NOT_FOUND
+        assert call(item_view, 'get', cart_pk=str(cart_id), pk='1').status_code == status.HTTP_404_NOT_FOUND
+        assert call(item_view, 'delete', cart_pk=str(cart_id), pk='1').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_destroy(self, store, products):
+        cart_id, _ = store.create()
+        store.persist(cart_id)
+
+        assert call(cart_view, 'delete', pk=str(cart_id)).status_code == status.HTTP_204_NO_CONTENT
+        assert not models.Cart.objects.exists()
+        assert store.get(cart_id) is None
+
+    def test_checkout_persists_the_cart(
+            self, store, products, api_client, query_budget, django_capture_on_commit_callbacks):
+        user = baker.make(get_user_model())
+        baker.make(models.Customer, user=user)
+        api_client.force_authenticate(user=user)
+        cart_id, _ = store.create()
+        store.add_item(cart_id, products[0].id, 2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post('/store/orders/', {'cart_id': str(cart_id)})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['orderitems'][0]['quantity'] == 2
+        assert not store.client.exists(store.key(cart_id))
+        assert query_budget(response).budget == 22
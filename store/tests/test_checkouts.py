@@ -0,0 +1,180 @@
+import os
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+import pytest
+import redis
+from model_bakery import baker
+
+from store import checkouts, models, tasks
+
+User = get_user_model()
+
+REDIS_URL = os.environ.get('STORE_TEST_REDIS_URL', 'redis://localhost:6379/15')
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """The shards handed to place_orders.delay(), which runs nothing."""
+    shards = []
+    monkeypatch.setattr(tasks.place_orders, 'delay', shards.append)
+    return shards
+
+
+@pytest.fixture(params=['locmem', 'redis'])
+def lock_cache(request, settings):
+    """Runs the test with the LocMemCache locks and with django_redis's."""
+    if request.param == 'redis':
+        try:
+            redis.Redis.from_url(REDIS_URL).flushdb()
+        except redis.ConnectionError:
+            pytest.skip(f'Redis is not available at {REDIS_URL}')
+        settings.CACHES = {'default': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': REDIS_URL}}
+        yield
+        redis.Redis.from_url(REDIS_URL).flushdb()
+    else:
+        yield
+
+
+@pytest.fixture
+def customer():
+    return baker.make(models.Customer, user=baker.make(User))
+
+
+@pytest.fixture
+def customer_client(customer):
+    client = APIClient()
+    client.force_authenticate(user=customer.user)
+    return client
+
+
+@pytest.fixture
+def product():
+    return baker.make(models.Product, unit_price=10, inventory=1)
+
+
+def make_cart(product, quantity=1):
+    cart = baker.make(models.Cart)
+    baker.make(models.CartItem, cart=cart, product=product, quantity=quantity)
+    return cart
+
+
+def place_async(client, cart_id, capture):
+    with capture(execute=True):
+        return client.post('/store/orders/', {'cart_id': cart_id}, HTTP_PREFER='respond-async')
+
+
+@pytest.mark.django_db
+class TestAsyncCheckout:
+    def test_returns_202_with_a_handle(
+            self, customer_client, customer, product, queued, django_capture_on_commit_callbacks):
+        cart = make_cart(product)
+
+        response = place_async(customer_client, cart.id, django_capture_on_commit_callbacks)
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == models.Checkout.STATUS_PENDING
+        assert response['Location'] == f'http://testserver/store/checkouts/{response.data["id"]}/'
+        assert response['Preference-Applied'] == 'respond-async'
+        assert queued == [checkouts.get_shard(customer.id)]
+        assert not models.Order.objects.exists()
+
+    def test_invalid_cart_is_rejected_up_front(self, customer_client, queued, django_capture_on_commit_callbacks):
+        response = place_async(customer_client, baker.prepare(models.Cart).id, django_capture_on_commit_callbacks)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not models.Checkout.objects.exists()
+        assert queued == []
+
+    def test_checkouts_are_placed_in_order(
+            self, customer_client, customer, product, queued, django_capture_on_commit_callbacks):
+        first = place_async(customer_client, make_cart(product).id, django_capture_on_commit_callbacks)
+        second = place_async(customer_client, make_cart(product).id, django_capture_on_commit_callbacks)
+
+        assert tasks.place_orders(queued[0]) == 2
+
+        first = models.Checkout.objects.get(pk=first.data['id'])
+        second = models.Checkout.objects.get(pk=second.data['id'])
+        assert first.status == models.Checkout.STATUS_COMPLETE
+        assert first.order.customer == customer
+        assert second.status == models.Checkout.STATUS_FAILED
+        assert second.errors == {'cart_id': [f'Not enough inventory for: {product.title}']}
+
+    def test_missing_cart_fails_the_checkout(self, customer):
+        checkout = baker.make(models.Checkout, customer=customer, cart_id=baker.prepare(models.Cart).id)
+
+        tasks.place_orders()
+
+        checkout.refresh_from_db()
+        assert checkout.status == models.Checkout.STATUS_FAILED
+
+    def test_unexpected_errors_fail_only_their_checkout(self, monkeypatch, customer, product):
+        broken = baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+        checkout = baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+
+        def persist_cart(cart_id):
+            if cart_id == broken.cart_id:
+                raise RuntimeError('Redis is down')
+        monkeypatch.setattr(checkouts, 'persist_cart', persist_cart)
+
+        assert checkouts.process(checkouts.get_shard(customer.id)) == 2
+
+        broken.refresh_from_db()
+        checkout.refresh_from_db()
+        assert broken.status == models.Checkout.STATUS_FAILED
+        assert checkout.status == models.Checkout.STATUS_COMPLETE
+
+    def test_expired_lock_taken_by_another_task_is_kept(self, monkeypatch, lock_cache, customer, product):
+        baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+        shard = checkouts.get_shard(customer.id)
+        lock_key = checkouts.LOCK_KEY.format(shard)
+        complete = checkouts.complete
+
+        def complete_slowly(checkout):
+            # The lock expires and another task takes it meanwhile.
+            checkouts.cache.set(lock_key, 'other')
+            complete(checkout)
+        monkeypatch.setattr(checkouts, 'complete', complete_slowly)
+
+        checkouts.process(shard)
+
+        assert checkouts.cache.get(lock_key) == 'other'
+
+    def test_busy_shard_is_left_to_its_task(self, lock_cache, customer, product):
+        checkout = baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+        shard = checkouts.get_shard(customer.id)
+        checkouts.cache.add(checkouts.LOCK_KEY.format(shard), 1)
+
+        assert tasks.place_orders(shard) == 0
+
+        checkout.refresh_from_db()
+        assert checkout.status == models.Checkout.STATUS_PENDING
+
+
+@pytest.mark.django_db
+class TestCheckoutStatus:
+    def test_wait_returns_once_processed(self, customer_client, customer, product):
+        checkout = baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+        tasks.place_orders()
+
+        response = customer_client.get(f'/store/checkouts/{checkout.id}/?wait=5')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == models.Checkout.STATUS_COMPLETE
+        assert response.data['order'] == models.Order.objects.get().id
+
+    def test_wait_times_out(self, customer_client, customer, product):
+        checkout = baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+
+        response = customer_client.get(f'/store/checkouts/{checkout.id}/?wait=0.1')
+
+        assert response.data['status'] == models.Checkout.STATUS_PENDING
+
+    def test_only_the_customer_sees_it(self, api_client, customer, product):
+        checkout = baker.make(models.Checkout, customer=customer, cart_id=make_cart(product).id)
+        api_client.force_authenticate(user=baker.make(User))
+
+        response = api_client.get(f'/store/checkouts/{checkout.id}/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store.models import Collection, Product, ProductImage, Promotion, Review
+
+User = get_user_model()
+
+
+@pytest.fixture
+def product():
+    collection = baker.make(Collection)
+    return baker.make(Product, collection=collection, unit_price=10, inventory=1)
+
+
+def revalidate(api_client, url, response):
+    return api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+@pytest.mark.django_db
+class TestConditionalProducts:
+    def test_detail_unchanged_returns_304(self, api_client, product):
+        url = f'/store/products/{product.id}/'
+        response = api_client.get(url)
+
+        assert 'Last-Modified' in response
+        revalidated = revalidate(api_client, url, response)
+
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+        assert revalidated.content == b''
+        assert revalidated['ETag'] == response['ETag']
+
+    def test_if_modified_since(self, api_client, product):
+        url = f'/store/products/{product.id}/'
+        response = api_client.get(url)
+
+        revalidated = api_client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_detail_changed_returns_200(self, api_client, product):
+        url = f'/store/products/{product.id}/'
+        response = api_client.get(url)
+
+        product.title = 'changed'
+        product.save()
+
+        assert revalidate(api_client, url, response).status_code == status.HTTP_200_OK
+
+    def test_promotion_changes_the_etag(self, api_client, product):
+        url = f'/store/products/{product.id}/'
+        response = api_client.get(url)
+
+        product.promotions.add(baker.make(Promotion, discount=10))
+
+        assert revalidate(api_client, url, response).status_code == status.HTTP_200_OK
+
+    def test_image_touches_last_update(self, product):
+        last_update = product.last_update
+
+        baker.make(ProductImage, product=product)
+
+        product.refresh_from_db()
+        assert product.last_update > last_update
+
+    def test_list_etag_depends_on_filters_and_rows(self, api_client, product):
+        url = '/store/products/'
+        response = api_client.get(url)
+        assert revalidate(api_client, url, response).status_code == status.HTTP_304_NOT_MODIFIED
+        assert revalidate(api_client, url + '?page=2', response).status_code != status.HTTP_304_NOT_MODIFIED
+
+        baker.make(Product, collection=product.collection, unit_price=10, inventory=1)
+
+        assert revalidate(api_client, url, response).status_code == status.HTTP_200_OK
+
+    def test_list_ignores_if_modified_since(self, api_client, product):
+        baker.make(Product, collection=product.collection, unit_price=10, inventory=1)
+        url = '/store/products/'
+        response = api_client.get(url)
+        assert 'Last-Modified' not in response
+
+        # Doesn't touch last_update, like the clear_inventory admin action.
+        Product.objects.filter(pk=product.pk).update(inventory=0)
+
+        revalidated = api_client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        assert revalidated.status_code == status.HTTP_200_OK
+        assert revalidate(api_client, url, response).status_code == status.HTTP_200_OK
+
+    def test_list_revalidation_runs_no_queries(self, api_client, product, django_assert_num_queries):
+        response = api_client.get('/store/products/')
+
+        with django_assert_num_queries(0):
+            assert revalidate(api_client, '/store/products/', response).status_code == status.HTTP_304_NOT_MODIFIED
+            api_client.get('/store/products/')
+
+
+@pytest.mark.django_db
+class TestConditionalCollectionsAndReviews:
+    def test_collection_list_uses_version_stamp(self, api_client, product):
+        url = '/store/collections/'
+        response = api_client.get(url)
+        assert revalidate(api_client, url, response).status_code == status.HTTP_304_NOT_MODIFIED
+
+        api_client.force_authenticate(user=User(is_staff=True, is_superuser=True, id=99999))
+        api_client.put(f'/store/collections/{product.collection.id}/', {'title': 'b'})
+
+        assert revalidate(api_client, url, response).status_code == status.HTTP_200_OK
+
+    def test_review_list(self, api_client, product):
+        url = f'/store/products/{product.id}/reviews/'
+        baker.make(Review, product=product)
+        response = api_client.get(url)
+        assert revalidate(api_client, url, response).status_code == status.HTTP_304_NOT_MODIFIED
+
+        baker.make(Review, product=product)
+
+        assert revalidate(api_client, url, response).status_code == status.HTTP_200_OK
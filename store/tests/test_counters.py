@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+import pytest
+from model_bakery import baker
+
+from store.models import Collection, Product
+
+
+def products_count(collection):
+    return Collection.objects.values_list('products_count', flat=True).get(pk=collection.pk)
+
+
+@pytest.fixture
+def collections():
+    return baker.make(Collection, _quantity=2)
+
+
+@pytest.mark.django_db
+class TestCollectionProductsCount:
+    def test_create_and_delete(self, collections):
+        products = baker.make(Product, collection=collections[0], _quantity=3)
+        assert products_count(collections[0]) == 3
+
+        products[0].delete()
+        assert products_count(collections[0]) == 2
+
+        Product.objects.filter(collection=collections[0]).delete()
+        assert products_count(collections[0]) == 0
+
+    def test_move_between_collections(self, collections):
+        product = baker.make(Product, collection=collections[0])
+
+        product = Product.objects.get(pk=product.pk)
+        product.collection = collections[1]
+        product.save()
+
+        assert products_count(collections[0]) == 0
+        assert products_count(collections[1]) == 1
+
+    def test_save_without_move_keeps_count(self, collections):
+        product = baker.make(Product, collection=collections[0])
+
+        product.title = 'changed'
+        product.save()
+
+        assert products_count(collections[0]) == 1
+
+    def test_save_of_a_product_loaded_without_its_collection(self, collections):
+        product = baker.make(Product, collection=collections[0])
+
+        product = Product.objects.only('id', 'title').get(pk=product.pk)
+        product.title = 'changed'
+        product.save()
+
+        assert products_count(collections[0]) == 1
+
+    def test_bulk_create_and_bulk_move(self, collections):
+        Product.objects.bulk_create([
+            baker.prepare(Product, collection=collections[0]) for _ in range(4)
+        ])
+        assert products_count(collections[0]) == 4
+
+        Product.objects.filter(collection=collections[0]).update(collection=collections[1])
+
+        assert products_count(collections[0]) == 0
+        assert products_count(collections[1]) == 4
+
+    def test_recount_command_repairs_drift(self, collections):
+        baker.make(Product, collection=collections[0], _quantity=2)
+        Collection.objects.update(products_count=42)
+
+        call_command('recount_collections', stdout=StringIO())
+
+        assert products_count(collections[0]) == 2
+        assert products_count(collections[1]) == 0
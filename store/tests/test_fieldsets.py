@@ -0,0 +1,154 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store import models
+from store.fieldsets import FieldSelection, parse_fields
+
+User = get_user_model()
+
+
+@pytest.fixture
+def product():
+    product = baker.make(models.Product, unit_price=10, inventory=5, description='Long text')
+    baker.make(models.ProductImage, product=product, image='store/images/a.jpg')
+    return product
+
+
+@pytest.fixture
+def cart(product):
+    cart = baker.make(models.Cart)
+    baker.make(models.CartItem, cart=cart, product=product, quantity=2)
+    return cart
+
+
+@pytest.fixture
+def customer_client(api_client, product):
+    user = baker.make(User)
+    customer = baker.make(models.Customer, user=user)
+    order = baker.make(models.Order, customer=customer)
+    baker.make(models.OrderItem, order=order, product=product, quantity=3, unit_price=10)
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def get(api_client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+class TestFieldSelection:
+    def test_parse_fields(self):
+        assert parse_fields('id, orderitems.quantity,orderitems.product.title,,') == {
+            'id': {},
+            'orderitems': {'quantity': {}, 'product': {'title': {}}},
+        }
+
+    def test_whole_field_wins_over_its_subfields(self):
+        assert parse_fields('items.id,items') == {'items': {}}
+        assert parse_fields('items,items.id') == {'items': {}}
+
+    def test_includes_and_expands(self):
+        selection = FieldSelection(parse_fields('id,items.product'), ['items.product', 'customer'])
+
+        assert selection.includes('id')
+        assert selection.includes('items.product.title')
+        assert not selection.includes('items.quantity')
+        assert selection.expands('items.product')
+        assert not selection.expands('customer')
+        assert FieldSelection().includes('anything.at.all')
+
+
+@pytest.mark.django_db
+class TestProductFields:
+    def test_fields_prune_output_and_queries(self, api_client, product):
+        response, queries = get(api_client, f'/store/products/{product.id}/?fields=id,title,effective_price')
+
+        assert response.data == {'id': product.id, 'title': product.title, 'effective_price': 11}
+        assert not any('store_productimage' in sql for sql in queries)
+        assert not any('"description"' in sql for sql in queries)
+
+    def test_list_with_cursor_keeps_ordering_columns(self, api_client, product):
+        response, _ = get(api_client, '/store/products/?fields=title&cursor=&ordering=-effective_price')
+
+        assert response.data['results'] == [{'title': product.title}]
+
+    def test_expand_collection(self, api_client, product):
+        response, queries = get(api_client, f'/store/products/{product.id}/?expand=collection&fields=id,collection')
+
+        assert response.data == {
+            'id': product.id,
+            'collection': {
+                'id': product.collection.id,
+                'title': product.collection.title,
+                'products_count': 1,
+            },
+        }
+        assert not any('store_productimage' in sql for sql in queries)
+
+    def test_fields_are_ignored_by_writes(self, api_client, product):
+        api_client.force_authenticate(user=User(is_staff=True, is_superuser=True))
+
+        response = api_client.patch(f'/store/products/{product.id}/?fields=id', {'title': 'a'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == 'a'
+        assert len(response.data['images']) == 1
+
+
+@pytest.mark.django_db
+class TestOrderFields:
+    def test_default_output_is_unchanged(self, customer_client, product):
+        response, _ = get(customer_client, '/store/orders/')
+
+        assert response.data[0]['orderitems'][0]['product'] == {
+            'id': product.id, 'title': product.title, 'unit_price': '10.00'}
+
+    def test_nested_fields_skip_products(self, customer_client):
+        response, queries = get(customer_client, '/store/orders/?fields=id,orderitems.quantity')
+
+        assert response.data[0]['orderitems'] == [{'quantity': 3}]
+        assert not any('store_product"' in sql for sql in queries)
+
+    def test_top_level_fields_skip_items(self, customer_client):
+        response, queries = get(customer_client, '/store/orders/?fields=id,payment_status')
+
+        assert list(response.data[0]) == ['id', 'payment_status']
+        assert not any('store_orderitem' in sql for sql in queries)
+
+    def test_expand_customer_and_product(self, customer_client, product):
+        response, _ = get(
+            customer_client,
+            '/store/orders/?expand=customer,orderitems.product'
+            '&fields=customer.phone,orderitems.product.effective_price')
+
+        assert response.data[0] == {
+            'customer': {'phone': models.Customer.objects.get().phone},
+            'orderitems': [{'product': {'effective_price': 11}}],
+        }
+
+
+@pytest.mark.django_db
+class TestCartFields:
+    def test_fields_skip_items(self, api_client, cart):
+        response, queries = get(api_client, f'/store/carts/{cart.id}/?fields=id')
+
+        assert response.data == {'id': str(cart.id)}
+        assert len(queries) == 1
+
+    def test_total_price_still_loads_products(self, api_client, cart):
+        response, _ = get(api_client, f'/store/carts/{cart.id}/?fields=total_price')
+
+        assert response.data == {'total_price': 20}
+
+    def test_expand_item_product(self, api_client, cart, product):
+        response, queries = get(
+            api_client, f'/store/carts/{cart.id}/?expand=cartitems.product&fields=cartitems.product.price_with_tax')
+
+        assert response.data == {'cartitems': [{'product': {'price_with_tax': 11}}]}
+        assert not any('store_productimage' in sql for sql in queries)
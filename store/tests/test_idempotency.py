@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APIClient
+import pytest
+from model_bakery import baker
+
+from store import models
+from store.idempotency import get_cache_key
+
+User = get_user_model()
+
+
+@pytest.fixture
+def product():
+    return baker.make(models.Product, unit_price=10, inventory=10)
+
+
+@pytest.fixture
+def cart(product):
+    cart = baker.make(models.Cart)
+    baker.make(models.CartItem, cart=cart, product=product, quantity=2)
+    return cart
+
+
+def make_customer_client():
+    user = baker.make(User)
+    baker.make(models.Customer, user=user)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestIdempotentOrders:
+    def test_retry_replays_the_first_response(self, cart, product):
+        client = make_customer_client()
+
+        first = client.post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+        retry = client.post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.data == first.data
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert models.Order.objects.count() == 1
+        assert models.Product.objects.get().inventory == 8
+
+    def test_keys_are_per_user(self, cart, product):
+        make_customer_client().post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+
+        response = make_customer_client().post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+
+        # Not a replay: the cart is gone for the second customer.
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_key_reused_with_another_body(self, cart):
+        client = make_customer_client()
+        client.post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+
+        response = client.post(
+            '/store/orders/', {'cart_id': baker.make(models.Cart).id}, HTTP_IDEMPOTENCY_KEY='a')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_errors_are_not_stored(self, product):
+        client = make_customer_client()
+        cart = baker.make(models.Cart)
+
+        response = client.post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        baker.make(models.CartItem, cart=cart, product=product, quantity=1)
+        response = client.post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_request_in_flight(self, cart, settings):
+        settings.STORE_IDEMPOTENCY_WAIT = 0.1
+        client = make_customer_client()
+        user = User.objects.get()
+        request = SimpleNamespace(user=user, method='POST', path='/store/orders/')
+        cache.add(f'{get_cache_key(request, "a")}:lock', 1)
+
+        response = client.post('/store/orders/', {'cart_id': cart.id}, HTTP_IDEMPOTENCY_KEY='a')
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response['Retry-After'] == '1'
+
+
+@pytest.mark.django_db
+class TestIdempotentCartItems:
+    def test_retry_does_not_add_twice(self, api_client, product):
+        cart = baker.make(models.Cart)
+        url = f'/store/carts/{cart.id}/items/'
+
+        for _ in range(2):
+            response = api_client.post(url, {'product': product.id, 'quantity': 2}, HTTP_IDEMPOTENCY_KEY='a')
+            assert response.status_code == status.HTTP_201_CREATED
+            assert response.data['quantity'] == 2
+
+        response = api_client.post(
+            f'{url}bulk/', [{'product': product.id, 'quantity': 1}], format='json', HTTP_IDEMPOTENCY_KEY='b')
+        response = api_client.post(
+            f'{url}bulk/', [{'product': product.id, 'quantity': 1}], format='json', HTTP_IDEMPOTENCY_KEY='b')
+
+        assert response.data[0]['quantity'] == 3
+        assert models.CartItem.objects.get().quantity == 3
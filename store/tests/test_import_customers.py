@@ -0,0 +1,91 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+import pytest
+
+from store.models import Customer
+
+User = get_user_model()
+
+PASSWORD = make_password('secret-password')
+
+
+def import_customers(path, **options):
+    stdout, stderr = StringIO(), StringIO()
+    call_command('import_customers', str(path), stdout=stdout, stderr=stderr, **options)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportCustomers:
+    def test_csv(self, tmp_path):
+        path = tmp_path / 'customers.csv'
+        path.write_text(
+            'username,email,first_name,last_name,password,phone,birth_date,membership\n'
+            f'john,john@example.com,John,Smith,{PASSWORD},555,1990-01-02,G\n'
+            'jane,,Jane,Doe,,,,\n')
+
+        stdout, stderr = import_customers(path, batch_size=1)
+
+        assert stderr == ''
+        assert 'Imported 2 customers' in stdout
+        assert 'rows/s' in stdout
+        john = Customer.objects.select_related('user').get(user__username='john')
+        assert john.membership == Customer.MEMBERSHIP_GOLD
+        assert str(john.birth_date) == '1990-01-02'
+        assert john.user.check_password('secret-password')
+        jane = User.objects.get(username='jane')
+        assert not jane.has_usable_password()
+        assert jane.customer.membership == Customer.MEMBERSHIP_BRONZE
+
+    def test_resumes_and_skips_invalid_rows(self, tmp_path):
+        User.objects.create_user(username='john')
+        path = tmp_path / 'customers.jsonl'
+        rows = [
+            {'username': 'john', 'password': PASSWORD},
+            {'username': 'jane', 'password': 'not-hashed'},
+            {'username': 'joe', 'password': PASSWORD},
+            {'username': 'joe', 'password': PASSWORD},
+        ]
+        path.write_text('\n'.join(json.dumps(row) for row in rows) + '\n{broken\n')
+
+        stdout, stderr = import_customers(path)
+
+        assert 'Imported 1 customers' in stdout
+        assert 'skipped 2 existing and 2 invalid rows' in stdout
+        assert 'Line 2:' in stderr and 'Line 5:' in stderr
+        assert set(User.objects.values_list('username', flat=True)) == {'john', 'joe'}
+        assert list(Customer.objects.values_list('user__username', flat=True)) == ['joe']
+
+    def test_values_the_columns_cannot_hold_are_reported(self, tmp_path):
+        path = tmp_path / 'customers.jsonl'
+        rows = [
+            {'username': 'john', 'email': 'not-an-email'},
+            {'username': 'jane', 'first_name': 'a' * 151},
+            {'username': 'joe', 'email': f'{"a" * 250}@example.com'},
+            {'username': 'mary', 'phone': '5' * 256},
+            {'username': 'mark', 'email': 'mark@example.com'},
+        ]
+        path.write_text(''.join(json.dumps(row) + '\n' for row in rows))
+
+        stdout, stderr = import_customers(path)
+
+        assert 'skipped 0 existing and 4 invalid rows' in stdout
+        assert 'Line 1: invalid email' in stderr
+        assert 'Line 2: first_name is longer than 150 characters' in stderr
+        assert 'Line 3: email is longer than 254 characters' in stderr
+        assert 'Line 4: phone is longer than 255 characters' in stderr
+        assert list(User.objects.values_list('username', flat=True)) == ['mark']
+
+    def test_queries_per_batch(self, tmp_path, django_assert_max_num_queries):
+        path = tmp_path / 'customers.jsonl'
+        path.write_text(''.join(json.dumps({'username': f'user{i}'}) + '\n' for i in range(10)))
+
+        # One lookup and two inserts per batch, plus savepoints.
+        with django_assert_max_num_queries(2 * 5):
+            import_customers(path, batch_size=5)
+
+        assert Customer.objects.count() == 10
@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+import pytest
+from model_bakery import baker
+
+from store import dispatch, models
+
+User = get_user_model()
+
+
+def make_cart(*items):
+    cart = baker.make(models.Cart)
+    for product, quantity in items:
+        baker.make(models.CartItem, cart=cart, product=product, quantity=quantity)
+    return cart
+
+
+def make_customer_client():
+    user = baker.make(User)
+    baker.make(models.Customer, user=user)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestCreateOrder:
+    def test_reserves_inventory(self):
+        first, second = baker.make(models.Product, unit_price=10, inventory=5, _quantity=2)
+        cart = make_cart((first, 2), (second, 5))
+
+        response = make_customer_client().post('/store/orders/', {'cart_id': cart.id})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert dict(models.Product.objects.values_list('pk', 'inventory')) == {first.id: 3, second.id: 0}
+
+    def test_short_inventory_fails_the_whole_order(self):
+        first, second = baker.make(models.Product, unit_price=10, inventory=5, _quantity=2)
+        cart = make_cart((first, 2), (second, 6))
+
+        response = make_customer_client().post('/store/orders/', {'cart_id': cart.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'cart_id': [f'Not enough inventory for: {second.title}']}
+        assert not models.Order.objects.exists()
+        assert models.Cart.objects.filter(pk=cart.pk).exists()
+        assert set(models.Product.objects.values_list('inventory', flat=True)) == {5}
+
+
+@pytest.mark.django_db
+class TestOrderHistory:
+    @pytest.fixture
+    def client(self):
+        return make_customer_client()
+
+    def make_orders(self, count, items, **kwargs):
+        customer = models.Customer.objects.get()
+        orders = baker.make(models.Order, customer=customer, _quantity=count, **kwargs)
+        for order in orders:
+            baker.make(models.OrderItem, order=order, unit_price=10, _quantity=items)
+        return orders
+
+    def test_queries_do_not_grow_with_the_orders(self, client):
+        self.make_orders(1, items=1)
+        client.get('/store/orders/')
+        few = client.get('/store/orders/').query_stats.count
+
+        self.make_orders(3, items=5)
+        response = client.get('/store/orders/')
+
+        assert len(response.data) == 4
+        assert response.query_stats.count == few
+
+    def test_customer_id_is_looked_up_once(self, client):
+        first = client.get('/store/orders/').query_stats.count
+
+        assert client.get('/store/orders/').query_stats.count == first - 1
+
+    def test_user_without_customer(self, api_client):
+        api_client.force_authenticate(user=baker.make(User))
+
+        response = api_client.get('/store/orders/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+
+    def test_newest_first_with_cursor_pages(self, client):
+        orders = self.make_orders(3, items=1)
+        for days, order in enumerate(orders):
+            models.Order.objects.filter(pk=order.pk).update(placed_at=timezone.now() - timedelta(days=days))
+
+        assert [order['id'] for order in client.get('/store/orders/').data] == [order.id for order in orders]
+
+        page = client.get('/store/orders/?cursor=&page_size=2').data
+        assert [order['id'] for order in page['results']] == [orders[0].id, orders[1].id]
+        page = client.get(page['next']).data
+        assert [order['id'] for order in page['results']] == [orders[2].id]
+        assert page['next'] is None
+
+    def test_filters(self, client):
+        old, new = self.make_orders(2, items=1)
+        models.Order.objects.filter(pk=old.pk).update(
+            placed_at=timezone.now() - timedelta(days=10), payment_status=models.Order.PAYMENT_STATUS_COMPLETE)
+        since = (timezone.now() - timedelta(days=1)).date()
+
+        response = client.get(f'/store/orders/?placed_at_after={since}')
+        assert [order['id'] for order in response.data] == [new.id]
+
+        response = client.get('/store/orders/?payment_status=C')
+        assert [order['id'] for order in response.data] == [old.id]
+
+
+@pytest.mark.django_db
+class TestBulkPaymentStatus:
+    @pytest.fixture
+    def admin_client(self, api_client):
+        api_client.force_authenticate(user=User(is_staff=True, id=99999))
+        return api_client
+
+    def test_reports_each_order(self, admin_client):
+        pending, complete = baker.make(models.Order, _quantity=2)
+        models.Order.objects.filter(pk=complete.pk).update(payment_status=models.Order.PAYMENT_STATUS_COMPLETE)
+
+        response = admin_client.post('/store/orders/payment-status/', {
+            'order_ids': [pending.id, complete.id, 0], 'payment_status': 'C'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'results': [
+            {'id': pending.id, 'outcome': 'updated'},
+            {'id': complete.id, 'outcome': 'unchanged'},
+            {'id': 0, 'outcome': 'not_found'},
+        ]}
+        assert set(models.Order.objects.values_list('payment_status', flat=True)) == {'C'}
+
+    def test_hooks_run_once_per_batch(self):
+        product = baker.make(models.Product, unit_price=10)
+        orders = baker.make(models.Order, _quantity=5)
+        for order in orders:
+            baker.make(models.OrderItem, order=order, product=product, quantity=1, unit_price=10)
+        batches = []
+        receiver = lambda sender, changed, **kwargs: batches.append(sorted(changed))
+        dispatch.payment_status_changed.connect(receiver, sender=models.Order)
+        try:
+            models.Order.objects.set_payment_status([order.id for order in orders], 'C', batch_size=2)
+        finally:
+            dispatch.payment_status_changed.disconnect(receiver, sender=models.Order)
+
+        assert len(batches) == 3
+        assert models.ProductDailySales.objects.get().units == 5
+
+        models.Order.objects.set_payment_status([orders[0].id], 'F')
+        assert models.ProductDailySales.objects.get().units == 4
+
+    def test_at_most_one_batch_per_request(self):
+        baker.make(models.Order, customer=baker.make(models.Customer), _quantity=models.PAYMENT_STATUS_BATCH_SIZE,
+                   _bulk_create=True)
+        order_ids = list(models.Order.objects.values_list('pk', flat=True))
+        client = APIClient()
+        client.force_authenticate(user=baker.make(User, is_staff=True))
+
+        response = client.post('/store/orders/payment-status/',
+                               {'order_ids': order_ids, 'payment_status': 'C'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.post('/store/orders/payment-status/',
+                               {'order_ids': order_ids + [0], 'payment_status': 'C'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_admins_only(self):
+        response = make_customer_client().post(
+            '/store/orders/payment-status/', {'order_ids': [1], 'payment_status': 'C'}, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkouts_do_not_oversell():
+    if not connection.features.has_select_for_update or connection.vendor == 'sqlite':
+        pytest.skip('Needs a database with row locks')
+
+    first, second = baker.make(models.Product, unit_price=10, inventory=5, _quantity=2)
+    # Half the carts list the products the other way round.
+    checkouts = [
+        (make_customer_client(), make_cart((first, 1), (second, 1)) if i % 2 else make_cart((second, 1), (first, 1)))
+        for i in range(12)
+    ]
+
+    def checkout(args):
+        client, cart = args
+        try:
+            return client.post('/store/orders/', {'cart_id': cart.id}).status_code
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(checkouts)) as executor:
+        statuses = list(executor.map(checkout, checkouts))
+
+    assert statuses.count(status.HTTP_201_CREATED) == 5
+    assert statuses.count(status.HTTP_400_BAD_REQUEST) == 7
+    assert set(models.Product.objects.values_list('inventory', flat=True)) == {0}
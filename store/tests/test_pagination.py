@@ -0,0 +1,82 @@
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store.models import Collection, Product
+
+
+@pytest.fixture
+def products():
+    collection = baker.make(Collection)
+    return [
+        baker.make(Product, collection=collection, unit_price=price, inventory=1)
+        for price in [5, 5, 5, 7, 7, 9, 11]
+    ]
+
+
+def get_all_pages(api_client, url):
+    ids = []
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        ids += [item['id'] for item in response.data['results']]
+        url = response.data['next']
+    return ids
+
+
+@pytest.mark.django_db
+class TestProductKeysetPagination:
+    def test_without_cursor_uses_page_numbers(self, api_client, products):
+        response = api_client.get('/store/products/')
+
+        assert response.data['count'] == len(products)
+
+    def test_pages_cover_every_row_once(self, api_client, products):
+        ids = get_all_pages(api_client, '/store/products/?cursor=&page_size=2')
+
+        expected = sorted(products, key=lambda p: (p.unit_price, p.id))
+        assert ids == [p.id for p in expected]
+        assert 'count' not in api_client.get('/store/products/?cursor=').data
+
+    def test_respects_ordering_and_filters(self, api_client, products):
+        ids = get_all_pages(api_client, '/store/products/?cursor=&page_size=2&ordering=-unit_price&unit_price__lt=10')
+
+        expected = sorted([p for p in products if p.unit_price < 10], key=lambda p: (-p.unit_price, -p.id))
+        assert ids == [p.id for p in expected]
+
+    def test_page_size_is_bounded(self, api_client):
+        collection = baker.make(Collection)
+        baker.make(Product, collection=collection, unit_price=1, inventory=1, _quantity=105)
+
+        response = api_client.get('/store/products/?cursor=&page_size=1000')
+
+        assert len(response.data['results']) == 100
+
+    def test_invalid_cursor_returns_404(self, api_client, products):
+        response = api_client.get('/store/products/?cursor=garbage')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cursor_from_another_ordering_returns_404(self, api_client, products):
+        next_url = api_client.get('/store/products/?cursor=&page_size=2').data['next']
+
+        response = api_client.get(next_url + '&ordering=-id')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestReviewKeysetPagination:
+    def test_without_cursor_returns_a_plain_list(self, api_client, products):
+        baker.make('store.Review', product=products[0], _quantity=3)
+
+        response = api_client.get(f'/store/products/{products[0].id}/reviews/')
+
+        assert len(response.data) == 3
+
+    def test_pages_cover_every_row_once(self, api_client, products):
+        reviews = baker.make('store.Review', product=products[0], _quantity=5)
+
+        ids = get_all_pages(api_client, f'/store/products/{products[0].id}/reviews/?cursor=&page_size=2')
+
+        assert ids == [review.id for review in reviews]
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store.models import Collection, Product, Promotion
+
+User = get_user_model()
+
+
+@pytest.fixture
+def make_product():
+    collection = baker.make(Collection)
+    def do_make_product(unit_price, *discounts):
+        product = baker.make(Product, collection=collection, unit_price=Decimal(unit_price), inventory=1)
+        for discount in discounts:
+            product.promotions.add(baker.make(Promotion, discount=discount))
+        return product
+    return do_make_product
+
+
+def effective_prices(api_client, **params):
+    response = api_client.get('/store/products/', params)
+    return [(item['id'], item['effective_price']) for item in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestEffectivePrice:
+    def test_prices_are_computed_by_the_database(self, make_product):
+        product = make_product('19.99', 10, 25)
+
+        product = Product.objects.with_prices().get(pk=product.pk)
+
+        assert product.price_with_tax == Decimal('21.99')
+        assert product.effective_price == Decimal('16.49')
+
+    def test_discounts_are_kept_between_0_and_100(self, make_product):
+        free = make_product('10.00', 150)
+        full = make_product('10.00', -20)
+
+        prices = dict(Product.objects.with_prices().values_list('pk', 'effective_price'))
+
+        assert prices == {free.id: Decimal('0.00'), full.id: Decimal('11.00')}
+        with pytest.raises(ValidationError):
+            Promotion(description='a', discount=150).full_clean()
+
+    def test_without_promotions_effective_price_is_price_with_tax(self, api_client, make_product):
+        product = make_product('10.00')
+
+        response = api_client.get(f'/store/products/{product.id}/')
+
+        assert response.data['price_with_tax'] == Decimal('11.00')
+        assert response.data['effective_price'] == Decimal('11.00')
+
+    def test_filter_by_effective_price(self, api_client, make_product):
+        discounted = make_product('100.00', 50)
+        make_product('100.00')
+        make_product('10.00')
+
+        assert effective_prices(api_client, effective_price__gt=50, effective_price__lt=100) == [
+            (discounted.id, Decimal('55.00'))
+        ]
+
+    def test_order_by_effective_price(self, api_client, make_product):
+        full = make_product('60.00')
+        discounted = make_product('100.00', 50)
+        cheap = make_product('10.00')
+
+        ids = [id for id, _ in effective_prices(api_client, ordering='effective_price')]
+
+        assert ids == [cheap.id, discounted.id, full.id]
+
+    def test_write_responses_include_prices(self, api_client):
+        collection = baker.make(Collection)
+        api_client.force_authenticate(user=User(is_staff=True, is_superuser=True, id=99999))
+
+        response = api_client.post('/store/products/', {
+            'title': 'a',
+            'slug': 'a',
+            'inventory': 1,
+            'unit_price': '20.00',
+            'collection': f'http://testserver/store/collections/{collection.id}/',
+        })
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['effective_price'] == Decimal('22.00')
@@ -0,0 +1,69 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+import pytest
+from model_bakery import baker
+
+from store.models import Collection, Product, ProductImage
+from store.serializers import ProductRowSerializer, ProductSerializer
+
+
+@pytest.fixture
+def request_():
+    return Request(APIRequestFactory().get('/store/products/'))
+
+
+@pytest.fixture
+def products():
+    collection = baker.make(Collection)
+    products = baker.make(Product, collection=collection, unit_price='19.99', inventory=3, _quantity=3)
+    products[1].description = None
+    products[1].save()
+    baker.make(ProductImage, product=products[0], image='store/images/a b.jpg')
+    baker.make(ProductImage, product=products[0], image='store/images/c.jpg')
+    return products
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+class TestProductRowSerializer:
+    def test_list_output_is_identical(self, request_, products):
+        queryset = Product.objects.with_prices().order_by('id')
+        expected = ProductSerializer(
+            queryset.prefetch_related('images'), many=True, context={'request': request_}).data
+
+        rows = queryset.values(*ProductRowSerializer.value_fields)
+        actual = ProductRowSerializer(rows, many=True, context={'request': request_}).data
+
+        assert render(actual) == render(expected)
+
+    def test_detail_output_is_identical(self, request_, products):
+        queryset = Product.objects.with_prices().filter(pk=products[0].pk)
+        expected = ProductSerializer(queryset.get(), context={'request': request_}).data
+
+        row = queryset.values(*ProductRowSerializer.value_fields).get()
+        actual = ProductRowSerializer(row, context={'request': request_}).data
+
+        assert render(actual) == render(expected)
+
+    def test_sparse_output_is_identical(self, products):
+        request = Request(APIRequestFactory().get('/store/products/', {'fields': 'id,collection,images,effective_price'}))
+        queryset = Product.objects.with_prices().order_by('id')
+        expected = ProductSerializer(
+            queryset.prefetch_related('images'), many=True, context={'request': request}).data
+
+        rows = queryset.values(*ProductRowSerializer.value_fields)
+        actual = ProductRowSerializer(rows, many=True, context={'request': request}).data
+
+        assert render(actual) == render(expected)
+        assert list(actual[0]) == ['id', 'effective_price', 'collection', 'images']
+
+    def test_views_use_the_row_serializer(self, api_client, products, django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = api_client.get('/store/products/')
+
+        assert [item['id'] for item in response.data['results']] == sorted(p.id for p in products)
+        assert len(response.data['results'][0]['images']) == 2
@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+import pytest
+from model_bakery import baker
+
+from store import models, tasks
+
+User = get_user_model()
+
+GIF = b'GIF89a\x01\x00\x01\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x01\x00\x00'
+
+
+@pytest.fixture
+def store_data():
+    collection = baker.make(models.Collection)
+    products = baker.make(models.Product, collection=collection, unit_price=10, inventory=100, _quantity=3)
+    for product in products:
+        baker.make(models.ProductImage, product=product, image='store/images/a.jpg', _quantity=2)
+        baker.make(models.Review, product=product, _quantity=2)
+    user = baker.make(User)
+    customer = baker.make(models.Customer, user=user)
+    for _ in range(2):
+        order = baker.make(models.Order, customer=customer)
+        for product in products:
+            baker.make(models.OrderItem, order=order, product=product, quantity=1, unit_price=10)
+    cart = baker.make(models.Cart)
+    for product in products:
+        baker.make(models.CartItem, cart=cart, product=product, quantity=2)
+    return {
+        'collection': collection,
+        'product': products[0],
+        'image': models.ProductImage.objects.filter(product=products[0]).first(),
+        'review': models.Review.objects.filter(product=products[0]).first(),
+        'user': user,
+        'customer': customer,
+        'order': order,
+        'cart': cart,
+        'cart_item': models.CartItem.objects.filter(cart=cart).first(),
+    }
+
+
+@pytest.fixture
+def superuser_client(api_client):
+    api_client.force_authenticate(user=User(is_staff=True, is_superuser=True, id=99999))
+    return api_client
+
+
+@pytest.mark.django_db
+class TestCatalogQueryBudgets:
+    def test_products(self, superuser_client, store_data, query_budget):
+        product, collection = store_data['product'], store_data['collection']
+        query_budget(superuser_client.get('/store/products/'))
+        query_budget(superuser_client.get(f'/store/products/{product.id}/'))
+        query_budget(superuser_client.post('/store/products/', {
+            'title': 'a', 'slug': 'a', 'inventory': 1, 'unit_price': 10,
+            'collection': f'http://testserver/store/collections/{collection.id}/',
+        }))
+        query_budget(superuser_client.patch(f'/store/products/{product.id}/', {'title': 'b'}))
+        new_product = baker.make(models.Product, collection=collection)
+        query_budget(superuser_client.delete(f'/store/products/{new_product.id}/'))
+
+    def test_collections(self, superuser_client, store_data, query_budget):
+        collection = store_data['collection']
+        query_budget(superuser_client.get('/store/collections/'))
+        query_budget(superuser_client.get(f'/store/collections/{collection.id}/'))
+        query_budget(superuser_client.post('/store/collections/', {'title': 'a'}))
+        query_budget(superuser_client.put(f'/store/collections/{collection.id}/', {'title': 'b'}))
+        query_budget(superuser_client.delete(f'/store/collections/{baker.make(models.Collection).id}/'))
+
+    def test_reviews(self, api_client, store_data, query_budget):
+        product, review = store_data['product'], store_data['review']
+        query_budget(api_client.get(f'/store/products/{product.id}/reviews/'))
+        query_budget(api_client.get(f'/store/products/{product.id}/reviews/{review.id}/'))
+        query_budget(api_client.post(f'/store/products/{product.id}/reviews/', {'name': 'a', 'description': 'b'}))
+
+    def test_images(self, api_client, store_data, query_budget, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        product, image = store_data['product'], store_data['image']
+        url = f'/store/products/{product.id}/images/'
+        query_budget(api_client.get(url))
+        query_budget(api_client.get(f'{url}{image.id}/'))
+        query_budget(api_client.post(url, {'image': SimpleUploadedFile('a.gif', GIF, 'image/gif')}))
+        query_budget(api_client.delete(f'{url}{image.id}/'))
+
+
+@pytest.mark.django_db
+class TestCartQueryBudgets:
+    def test_carts(self, api_client, store_data, query_budget):
+        query_budget(api_client.post('/store/carts/'))
+        query_budget(api_client.get(f'/store/carts/{store_data["cart"].id}/'))
+        query_budget(api_client.delete(f'/store/carts/{store_data["cart"].id}/'))
+
+    def test_cart_items(self, api_client, store_data, query_budget):
+        cart, item = store_data['cart'], store_data['cart_item']
+        url = f'/store/carts/{cart.id}/items/'
+        query_budget(api_client.get(url))
+        query_budget(api_client.get(f'{url}{item.id}/'))
+        query_budget(api_client.post(url, {'product': store_data['product'].id, 'quantity': 1}))
+        query_budget(api_client.post(f'{url}bulk/', [{'product': store_data['product'].id, 'quantity': 1}], format='json'))
+        query_budget(api_client.patch(f'{url}{item.id}/', {'quantity': 5}))
+        query_budget(api_client.delete(f'{url}{item.id}/'))
+
+
+@pytest.mark.django_db
+class TestCustomerQueryBudgets:
+    def test_customers(self, superuser_client, store_data, query_budget):
+        query_budget(superuser_client.get('/store/customers/'))
+        query_budget(superuser_client.get(f'/store/customers/{store_data["customer"].id}/'))
+
+    def test_me(self, api_client, store_data, query_budget):
+        api_client.force_authenticate(user=store_data['user'])
+        query_budget(api_client.get('/store/customers/me/'))
+        query_budget(api_client.put('/store/customers/me/', {'phone': '1'}))
+
+    def test_orders(self, api_client, store_data, query_budget):
+        api_client.force_authenticate(user=store_data['user'])
+        query_budget(api_client.get('/store/orders/'))
+        query_budget(api_client.get(f'/store/orders/{store_data["order"].id}/'))
+        query_budget(api_client.post('/store/orders/', {'cart_id': store_data['cart'].id}))
+
+    def test_checkouts(self, api_client, store_data, query_budget, monkeypatch):
+        monkeypatch.setattr(tasks.place_orders, 'delay', lambda shard: None)
+        api_client.force_authenticate(user=store_data['user'])
+        response = api_client.post('/store/orders/', {'cart_id': store_data['cart'].id}, HTTP_PREFER='respond-async')
+        query_budget(response)
+        query_budget(api_client.get(f'/store/checkouts/{response.data["id"]}/'))
+
+    def test_order_admin(self, superuser_client, store_data, query_budget):
+        order = store_data['order']
+        query_budget(superuser_client.patch(f'/store/orders/{order.id}/', {'payment_status': 'C'}))
+        empty_order = baker.make(models.Order, customer=store_data['customer'])
+        query_budget(superuser_client.delete(f'/store/orders/{empty_order.id}/'))
+        query_budget(superuser_client.post('/store/orders/payment-status/', {
+            'order_ids': [order.id, empty_order.id], 'payment_status': 'F'}, format='json'))
+
+    def test_analytics(self, superuser_client, store_data, query_budget):
+        query_budget(superuser_client.get('/store/analytics/products/'))
+        query_budget(superuser_client.get('/store/analytics/collections/?cursor='))
+
+    def test_customer_admin(self, superuser_client, store_data, query_budget):
+        customer = store_data['customer']
+        query_budget(superuser_client.patch(f'/store/customers/{customer.id}/', {'phone': '1'}))
+        query_budget(superuser_client.delete(f'/store/customers/{baker.make(models.Customer).id}/'))
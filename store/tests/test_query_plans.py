@@ -0,0 +1,94 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+import pytest
+from model_bakery import baker
+
+from store import models, views
+from store.pagination import KeysetPagination
+
+User = get_user_model()
+
+
+@pytest.fixture
+def seeded_db():
+    collections = baker.make(models.Collection, _quantity=10)
+    products = [
+        baker.make(models.Product, collection=collections[i % 10], unit_price=i % 100 + 1, inventory=i)
+        for i in range(300)
+    ]
+    customers = [baker.make(models.Customer, user=baker.make(User)) for _ in range(50)]
+    for product in products[:50]:
+        baker.make(models.Review, product=product, _quantity=3)
+    for customer in customers:
+        baker.make(models.Order, customer=customer, _quantity=3)
+    carts = baker.make(models.Cart, _quantity=50)
+    for cart in carts:
+        for product in products[:3]:
+            baker.make(models.CartItem, cart=cart, product=product, quantity=1)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {'product': products[0], 'customer': customers[0], 'cart': carts[0]}
+
+
+def view_queryset(viewset, action, user=None, kwargs=None, **params):
+    request = Request(APIRequestFactory().get('/', params))
+    if user is not None:
+        request.user = user
+    view = viewset(action=action, request=request, kwargs=kwargs or {}, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset()).all()
+
+
+def keyset_page(queryset, values):
+    paginator = KeysetPagination()
+    paginator.ordering = paginator.get_ordering(queryset, None)
+    return queryset.filter(paginator.get_position_filter(values)).order_by(*paginator.ordering)[:10]
+
+
+QUERYSETS = {
+    'product-list': lambda db: view_queryset(views.ProductViewSet, 'list')[:10],
+    'product-list-keyset': lambda db: keyset_page(view_queryset(views.ProductViewSet, 'list'), [50, 150]),
+    'product-list-filtered': lambda db: view_queryset(
+        views.ProductViewSet, 'list',
+        collection=db['product'].collection_id, unit_price__gt=10, unit_price__lt=50)[:10],
+    'product-detail': lambda db: view_queryset(views.ProductViewSet, 'retrieve').filter(pk=db['product'].pk),
+    'product-images': lambda db: view_queryset(
+        views.ProductImageViewSet, 'list', kwargs={'product_pk': db['product'].pk}),
+    'collection-list': lambda db: view_queryset(views.CollectionViewSet, 'list'),
+    'review-list': lambda db: view_queryset(
+        views.ReviewViewSet, 'list', kwargs={'product_pk': db['product'].pk}),
+    'cart-detail': lambda db: view_queryset(views.CartViewSet, 'retrieve').filter(pk=db['cart'].pk),
+    'cart-item-list': lambda db: view_queryset(
+        views.CartItemViewSet, 'list', kwargs={'cart_pk': db['cart'].pk}),
+    'customer-list': lambda db: view_queryset(views.CustomerViewSet, 'list')[:10],
+    'order-list': lambda db: view_queryset(views.OrderViewSet, 'list', user=db['customer'].user),
+}
+
+
+def explain(queryset):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            # Tiny test tables are cheaper to scan; make the planner show
+            # whether an index could serve the query at all.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+def sequential_scans(plan):
+    if connection.vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    # SQLite prints "SCAN table" for a full table scan and
+    # "SCAN table USING [COVERING] INDEX name" for an ordered index scan.
+    return re.findall(r'\bSCAN (\w+)\s*$', plan, re.MULTILINE)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', QUERYSETS)
+def test_query_plan_uses_indexes(seeded_db, name):
+    plan = explain(QUERYSETS[name](seeded_db))
+
+    assert sequential_scans(plan) == [], plan
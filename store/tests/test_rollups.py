@@ -0,0 +1,137 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+import pytest
+from model_bakery import baker
+
+from store import models
+
+User = get_user_model()
+
+
+@pytest.fixture
+def products():
+    collection = baker.make(models.Collection)
+    return baker.make(models.Product, collection=collection, unit_price=10, _quantity=2)
+
+
+@pytest.fixture
+def admin_client(api_client):
+    api_client.force_authenticate(user=User(is_staff=True, id=99999))
+    return api_client
+
+
+def make_order(*items, days_ago=0):
+    order = baker.make(models.Order)
+    models.Order.objects.filter(pk=order.pk).update(placed_at=timezone.now() - timedelta(days=days_ago))
+    for product, quantity, unit_price in items:
+        baker.make(models.OrderItem, order=order, product=product, quantity=quantity, unit_price=unit_price)
+    return models.Order.objects.get(pk=order.pk)
+
+
+def complete(order, payment_status=models.Order.PAYMENT_STATUS_COMPLETE):
+    order.payment_status = payment_status
+    order.save()
+
+
+def product_sales():
+    return {
+        (row.product_id, row.date): (row.units, row.revenue, row.orders)
+        for row in models.ProductDailySales.objects.all()
+    }
+
+
+def collection_sales():
+    return {
+        (row.collection_id, row.date): (row.units, row.revenue, row.orders)
+        for row in models.CollectionDailySales.objects.all()
+    }
+
+
+@pytest.mark.django_db
+class TestRollups:
+    def test_completed_orders_are_added(self, products):
+        first, second = products
+        today = timezone.now().date()
+        complete(make_order((first, 2, Decimal('10.50')), (second, 1, 10)))
+        complete(make_order((first, 1, 10)))
+        make_order((first, 5, 10))
+
+        assert product_sales() == {
+            (first.id, today): (3, Decimal('31.00'), 2),
+            (second.id, today): (1, Decimal('10.00'), 1),
+        }
+        assert collection_sales() == {(first.collection_id, today): (4, Decimal('41.00'), 2)}
+
+    def test_reopened_orders_are_taken_out(self, products):
+        order = make_order((products[0], 2, 10))
+        complete(order)
+        complete(order)
+        complete(order, models.Order.PAYMENT_STATUS_FAILED)
+
+        assert product_sales() == {(products[0].id, timezone.now().date()): (0, Decimal('0.00'), 0)}
+
+    def test_reopened_orders_leave_the_collection_they_were_placed_in(self, products):
+        order = make_order((products[0], 2, 10))
+        complete(order)
+        old_collection = products[0].collection
+        products[0].collection = baker.make(models.Collection)
+        products[0].save()
+
+        complete(order, models.Order.PAYMENT_STATUS_FAILED)
+
+        assert collection_sales() == {(old_collection.id, timezone.now().date()): (0, Decimal('0.00'), 0)}
+
+    def test_orders_loaded_without_their_status(self, products):
+        order = make_order((products[0], 2, 10))
+        complete(order)
+        order = models.Order.objects.only('id').get(pk=order.pk)
+        complete(order)
+
+        assert product_sales()[products[0].id, timezone.now().date()][0] == 2
+
+    def test_fallback_without_upsert(self, products):
+        row = {'product_id': products[0].id, 'date': date(2022, 1, 1), 'units': 1, 'revenue': 10, 'orders': 1}
+        models.ProductDailySales.objects.all()._add(row)
+        models.ProductDailySales.objects.all()._add(row)
+
+        assert product_sales() == {(products[0].id, date(2022, 1, 1)): (2, Decimal('20.00'), 2)}
+
+    def test_backfill_matches_the_incremental_rollups(self, products):
+        complete(make_order((products[0], 2, 10), days_ago=3))
+        complete(make_order((products[0], 1, 10), (products[1], 4, 5)))
+        expected = product_sales(), collection_sales()
+        models.ProductDailySales.objects.update(units=0)
+
+        call_command('backfill_sales', batch_size=1, stdout=open('/dev/null', 'w'))
+        assert (product_sales(), collection_sales()) == expected
+
+        call_command('backfill_sales', since=timezone.now().date(), stdout=open('/dev/null', 'w'))
+        assert (product_sales(), collection_sales()) == expected
+
+
+@pytest.mark.django_db
+class TestAnalyticsViews:
+    def test_daily_sales(self, admin_client, products):
+        complete(make_order((products[0], 2, 10), days_ago=3))
+        complete(make_order((products[0], 1, 10)))
+        today = timezone.now().date()
+
+        response = admin_client.get('/store/analytics/products/')
+        assert [(row['date'], row['units']) for row in response.data] == \
+            [(str(today), 1), (str(today - timedelta(days=3)), 2)]
+
+        response = admin_client.get(f'/store/analytics/collections/?date_after={today}')
+        assert response.data == [{
+            'collection': products[0].collection_id, 'date': str(today),
+            'units': 1, 'revenue': '10.00', 'orders': 1,
+        }]
+
+    def test_admins_only(self, api_client):
+        api_client.force_authenticate(user=baker.make(User))
+
+        assert api_client.get('/store/analytics/products/').status_code == status.HTTP_403_FORBIDDEN
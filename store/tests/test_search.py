@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+
+import pytest
+from model_bakery import baker
+
+from store.models import Collection, Product
+
+
+@pytest.fixture
+def make_product():
+    collection = baker.make(Collection)
+    def do_make_product(title, description='', unit_price=10):
+        return baker.make(Product, title=title, description=description,
+                          collection=collection, unit_price=unit_price, inventory=1)
+    return do_make_product
+
+
+def search(api_client, query):
+    response = api_client.get('/store/products/', {'search': query})
+    return [item['id'] for item in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestProductSearch:
+    def test_matches_title_and_description(self, api_client, make_product):
+        title = make_product('Red coffee mug')
+        description = make_product('Cup', 'A mug for tea')
+        make_product('Plate')
+
+        assert set(search(api_client, 'mug')) == {title.id, description.id}
+
+    def test_title_matches_rank_first(self, api_client, make_product):
+        description = make_product('Cup', 'A mug for tea', unit_price=1)
+        title = make_product('Mug', unit_price=99)
+
+        assert search(api_client, 'mug') == [title.id, description.id]
+
+    def test_every_word_must_match_and_last_is_a_prefix(self, api_client, make_product):
+        match = make_product('Green coffee mug')
+        make_product('Green tea')
+
+        assert search(api_client, 'green cof') == [match.id]
+
+    def test_explicit_ordering_wins_over_rank(self, api_client, make_product):
+        cheap = make_product('Cup', 'A mug', unit_price=1)
+        expensive = make_product('Mug', unit_price=99)
+
+        response = api_client.get('/store/products/', {'search': 'mug', 'ordering': '-unit_price'})
+
+        assert [item['id'] for item in response.data['results']] == [expensive.id, cheap.id]
+
+    def test_punctuation_only_matches_nothing(self, api_client, make_product):
+        make_product('Mug')
+
+        assert search(api_client, '"*') == []
+
+    def test_index_follows_saves_updates_and_deletes(self, api_client, make_product):
+        product = make_product('Mug')
+
+        product.title = 'Bowl'
+        product.save()
+        assert search(api_client, 'bowl') == [product.id]
+        assert search(api_client, 'mug') == []
+
+        Product.objects.filter(id=product.id).update(title='Plate')
+        assert search(api_client, 'plate') == [product.id]
+
+        product.delete()
+        assert search(api_client, 'plate') == []
+
+    def test_rebuild_command_backfills_index(self, api_client, make_product):
+        product = make_product('Mug')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM store_product_fts')
+        assert search(api_client, 'mug') == []
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        assert search(api_client, 'mug') == [product.id]
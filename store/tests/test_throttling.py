@@ -0,0 +1,100 @@
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+import pytest
+import redis
+from model_bakery import baker
+
+from core.throttling import get_token_buckets
+from store import models
+
+REDIS_URL = os.environ.get('STORE_TEST_REDIS_URL', 'redis://localhost:6379/15')
+
+
+@pytest.fixture
+def buckets(settings):
+    settings.CORE_THROTTLE_REDIS_URL = REDIS_URL
+    settings.CORE_THROTTLE_BUCKETS = {
+        'cart': ('60/min', 3), 'orders': ('10/min', 1), 'reviews': ('100/s', 1), 'auth': ('60/min', 2),
+    }
+    client = redis.Redis.from_url(REDIS_URL)
+    try:
+        client.flushdb()
+    except redis.ConnectionError:
+        pytest.skip(f'Redis is not available at {REDIS_URL}')
+    yield get_token_buckets()
+    client.flushdb()
+
+
+def create_carts(api_client, count, **kwargs):
+    return [api_client.post('/store/carts/', **kwargs) for _ in range(count)]
+
+
+@pytest.mark.django_db
+class TestTokenBucketThrottle:
+    def test_bursts_are_allowed_then_throttled(self, api_client, buckets):
+        responses = create_carts(api_client, 4)
+
+        assert [response.status_code for response in responses[:3]] == [status.HTTP_201_CREATED] * 3
+        assert responses[3].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert responses[3]['Retry-After'] == '1'
+
+    def test_reads_are_not_throttled(self, api_client, buckets):
+        cart_id = create_carts(api_client, 3)[0].data['id']
+
+        for _ in range(5):
+            assert api_client.get(f'/store/carts/{cart_id}/').status_code == status.HTTP_200_OK
+
+    def test_buckets_are_per_client(self, api_client, buckets):
+        create_carts(api_client, 3)
+
+        assert create_carts(api_client, 1, REMOTE_ADDR='10.0.0.2')[0].status_code == status.HTTP_201_CREATED
+
+    def test_forwarded_for_addresses_set_by_clients_are_ignored(self, api_client, buckets):
+        responses = [
+            api_client.post('/store/carts/', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 10.0.1.1') for i in range(4)
+        ]
+
+        assert responses[3].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        response = api_client.post('/store/carts/', HTTP_X_FORWARDED_FOR='10.0.0.1, 10.0.1.2')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_buckets_refill(self, api_client, buckets):
+        product = baker.make(models.Product)
+        url = f'/store/products/{product.id}/reviews/'
+        data = {'name': 'a', 'description': 'b'}
+
+        assert api_client.post(url, data).status_code == status.HTTP_201_CREATED
+        assert api_client.post(url, data).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        time.sleep(0.02)
+        assert api_client.post(url, data).status_code == status.HTTP_201_CREATED
+
+    def test_auth_endpoints_are_throttled(self, api_client, buckets):
+        codes = [api_client.post('/auth/jwt/refresh/', {'refresh': 'x'}).status_code for _ in range(3)]
+
+        assert codes == [status.HTTP_401_UNAUTHORIZED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS]
+
+    def test_only_order_creation_is_throttled(self, api_client, buckets):
+        api_client.force_authenticate(user=get_user_model().objects.create_user('admin', is_staff=True))
+        order = baker.make(models.Order)
+
+        for _ in range(3):
+            response = api_client.patch(f'/store/orders/{order.id}/', {'payment_status': 'C'})
+            assert response.status_code == status.HTTP_200_OK
+            response = api_client.post('/store/orders/payment-status/',
+                                       {'order_ids': [order.id], 'payment_status': 'F'}, format='json')
+            assert response.status_code == status.HTTP_200_OK
+
+        codes = [api_client.post('/store/orders/', {}).status_code for _ in range(2)]
+        assert codes == [status.HTTP_400_BAD_REQUEST, status.HTTP_429_TOO_MANY_REQUESTS]
+
+    def test_requests_are_let_through_without_redis(self, api_client, settings):
+        settings.CORE_THROTTLE_REDIS_URL = 'redis://localhost:1/0'
+        settings.CORE_THROTTLE_BUCKETS = {'cart': ('1/min', 1)}
+
+        responses = create_carts(api_client, 3)
+
+        assert [response.status_code for response in responses] == [status.HTTP_201_CREATED] * 3
+        assert get_token_buckets().down_until > time.monotonic()
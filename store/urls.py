@@ -1,13 +1,21 @@
 from django.urls import path, include
 from rest_framework_nested import routers
-from . import views
+from . import carts, views
+
+if carts.get_backend() == carts.REDIS_BACKEND:
+    cart_viewset, cart_item_viewset = views.RedisCartViewSet, views.RedisCartItemViewSet
+else:
+    cart_viewset, cart_item_viewset = views.CartViewSet, views.CartItemViewSet
 
 router = routers.DefaultRouter()
 router.register('products', views.ProductViewSet, basename='products')
 router.register('collections', views.CollectionViewSet)
-router.register('carts', views.CartViewSet, basename='carts')
+router.register('carts', cart_viewset, basename='carts')
 router.register('customers', views.CustomerViewSet)
 router.register('orders', views.OrderViewSet, basename='orders')
+router.register('checkouts', views.CheckoutViewSet, basename='checkouts')
+router.register('analytics/products', views.ProductDailySalesViewSet, basename='product-sales')
+router.register('analytics/collections', views.CollectionDailySalesViewSet, basename='collection-sales')
 
 products_router = routers.NestedSimpleRouter(router, 'products', lookup='product')
 products_router.register('reviews', views.ReviewViewSet, basename='product-reviews')
@@ -15,6 +23,6 @@ products_router.register('reviews', views.ReviewViewSet, basename='product-revie
 products_router.register('images', views.ProductImageViewSet, basename='product-images')
 
 carts_router = routers.NestedSimpleRouter(router, 'carts', lookup='cart')
-carts_router.register('items', views.CartItemViewSet, basename='cart-items')
+carts_router.register('items', cart_item_viewset, basename='cart-items')
 
 urlpatterns = router.urls + products_router.urls + carts_router.urls
\ No newline at end of file
@@ -1,35 +1,119 @@
-from django.db.models.aggregates import Count
+from uuid import UUID
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework.viewsets import ModelViewSet, GenericViewSet
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions, DjangoModelPermissionsOrAnonReadOnly, IsAdminUser
 from rest_framework.decorators import action
-from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin, DestroyModelMixin
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.exceptions import NotFound
+from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin, DestroyModelMixin
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
+from . import carts
+from . import checkouts
 from . import models
 from . import serializers
-from .filters import ProductFilter
-from .pagination import DefaultPageNumberPagination
+from . import tasks
+from .cache import CachedResponseMixin, get_customer_id
+from .conditional import ConditionalGetMixin
+from .fieldsets import FieldSelection, join
+from .idempotency import idempotent
+from .filters import CollectionDailySalesFilter, OrderFilter, ProductDailySalesFilter, ProductFilter
+from .pagination import OptInKeysetPagination, ProductPagination
 from .permissions import IsAdminOrReadOnly, FullDjangoModelPermissions
+from .search import FullTextSearchFilter
 
 
-class ProductViewSet(ModelViewSet):
-    queryset = models.Product.objects.prefetch_related('images').all()
+def select_products(queryset, selection, path=''):
+    """
+    Loads only what ProductSerializer needs for the fields selected at `path`.
+    """
+    if not selection.includes(join(path, 'description')):
+        queryset = queryset.defer('description')
+    if selection.includes(join(path, 'images')):
+        queryset = queryset.prefetch_related('images')
+    if selection.expands(join(path, 'collection')):
+        queryset = queryset.select_related('collection')
+    return queryset
+
+
+def prefetch_products(selection, path, lookup):
+    """
+    Prefetches the products nested at `path`, with their prices when the
+    request expands them to ProductSerializer.
+    """
+    if selection.expands(path):
+        queryset = select_products(models.Product.objects.with_prices(), selection, path)
+        return Prefetch(lookup, queryset=queryset)
+    return lookup
+
+
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    queryset = models.Product.objects.with_prices()
     serializer_class = serializers.ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_class = ProductFilter
-    pagination_class = DefaultPageNumberPagination
+    pagination_class = ProductPagination
     permission_classes = [DjangoModelPermissionsOrAnonReadOnly]
     search_fields = ['title', 'description']
-    ordering = ['unit_price', 'unit_price']
-    ordering_fields = ['id', 'unit_price', 'updated_at']
+    ordering = ['unit_price', 'id']
+    ordering_fields = ['id', 'unit_price', 'effective_price', 'updated_at']
+    cache_namespace = 'product'
+    last_modified_field = 'last_update'
+    # Writes include the query that loads the user's permissions when they
+    # aren't cached, see core.backends.
+    query_budgets = {
+        'list': 3, 'retrieve': 3, 'create': 8,
+        'update': 7, 'partial_update': 7, 'destroy': 12,
+    }
+
+    def is_fast_read(self):
+        # ProductRowSerializer has no expansions.
+        return self.action in ('list', 'retrieve') \
+            and self.request.method in ('GET', 'HEAD') \
+            and not FieldSelection.from_request(self.request).expand
+
+    def get_queryset(self):
+        if self.is_fast_read():
+            return super().get_queryset()
+        if self.action in ('update', 'partial_update', 'destroy'):
+            # The prices and images are loaded once the product is saved.
+            return models.Product.objects.all()
+        return select_products(super().get_queryset(), FieldSelection.from_request(self.request))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.is_fast_read():
+            return queryset
+        # Rows also carry the ordering columns the keyset cursor is built from.
+        fields = serializers.ProductRowSerializer.get_value_fields(FieldSelection.from_request(self.request))
+        ordering = [
+            field.lstrip('-') for field in queryset.query.order_by or self.ordering
+            if isinstance(field, str) and field.lstrip('-') not in ('pk', *fields)
+        ]
+        return queryset.values(*fields, *ordering)
+
+    def get_serializer_class(self):
+        if self.is_fast_read():
+            return serializers.ProductRowSerializer
+        return serializers.ProductSerializer
 
     def get_serializer_context(self):
         return {'request': self.request}
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        serializer.instance = self.queryset.prefetch_related('images').get(pk=serializer.instance.pk)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        serializer.instance = self.queryset.prefetch_related('images').get(pk=serializer.instance.pk)
+
     def destroy(self, request, *args, **kwargs):
         if models.OrderItem.objects.filter(product_id=kwargs['pk']).count() > 0:
             return Response({'error': 'Product cannot be deleted because it is associated with an order item.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -38,6 +122,10 @@ class ProductViewSet(ModelViewSet):
 
 class ProductImageViewSet(ModelViewSet):
     serializer_class = serializers.ProductImageSerializer
+    query_budgets = {
+        'list': 1, 'retrieve': 1, 'create': 2,
+        'update': 3, 'partial_update': 3, 'destroy': 3,
+    }
 
     def get_queryset(self):
         return models.ProductImage.objects.filter(product_id=self.kwargs['product_pk'])
@@ -46,25 +134,40 @@ class ProductImageViewSet(ModelViewSet):
         return {'product_id': self.kwargs['product_pk']}
 
 
-class CollectionViewSet(ModelViewSet):
-    queryset = models.Collection.objects.annotate(
-        products_count=Count('products'))
+class CollectionViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    queryset = models.Collection.objects.all()
     serializer_class = serializers.CollectionSerializer
     permission_classes = [DjangoModelPermissionsOrAnonReadOnly]
+    cache_namespace = 'collection'
+    # Writes include the query that loads the user's permissions when they
+    # aren't cached, destroy the one that deletes the collection's daily sales
+    # and the one that unlinks it from order items.
+    query_budgets = {
+        'list': 1, 'retrieve': 1, 'create': 2,
+        'update': 3, 'partial_update': 3, 'destroy': 6,
+    }
 
     def destroy(self, request, *args, **kwargs):
-        if models.Product.objects.filter(collection_id=kwargs['pk']).count() > 0:
+        collection = self.get_object()
+        if collection.products_count > 0:
             return Response({'error': 'Collection cannot be deleted because it includes one or more products.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
-        return super().destroy(request, *args, **kwargs)
+        self.perform_destroy(collection)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, ModelViewSet):
     queryset = models.Review.objects
     serializer_class = serializers.ReviewSerializer
+    pagination_class = OptInKeysetPagination
+    last_modified_field = 'updated_at'
     http_method_names = ['get', 'post']
+    throttle_scope = 'reviews'
+    query_budgets = {'list': 2, 'retrieve': 2, 'create': 1}
 
     def get_queryset(self):
-        return models.Review.objects.filter(product_id=self.kwargs['product_pk'])
+        return models.Review.objects \
+            .filter(product_id=self.kwargs['product_pk']) \
+            .order_by('created_at', 'id')
 
     def get_serializer_context(self):
         return {'product_id': self.kwargs['product_pk']}
@@ -74,12 +177,40 @@ class CartViewSet(CreateModelMixin,
                   RetrieveModelMixin,
                   DestroyModelMixin,
                   GenericViewSet):
-    queryset = models.Cart.objects.prefetch_related('cartitems__product')
+    queryset = models.Cart.objects.all()
     serializer_class = serializers.CartSerializer
+    throttle_scope = 'cart'
+    query_budgets = {'create': 1, 'retrieve': 3, 'destroy': 5}
+
+    def get_queryset(self):
+        selection = FieldSelection.from_request(self.request)
+        queryset = self.queryset
+        if selection.includes('total_price'):
+            queryset = queryset.with_total_price()
+        if selection.includes('cartitems'):
+            items = models.CartItem.objects.all()
+            if selection.includes('cartitems.total_price'):
+                items = items.with_total_price()
+            queryset = queryset.prefetch_related(Prefetch('cartitems', queryset=items))
+        if selection.includes('cartitems.product'):
+            queryset = queryset.prefetch_related(
+                prefetch_products(selection, 'cartitems.product', 'cartitems__product'))
+        return queryset
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        # A new cart has no items.
+        serializer.instance.total_price = None
+        serializer.instance._prefetched_objects_cache = {'cartitems': models.CartItem.objects.none()}
 
 
 class CartItemViewSet(ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scope = 'cart'
+    query_budgets = {
+        'list': 2, 'retrieve': 2, 'create': 2, 'bulk': 2,
+        'partial_update': 3, 'destroy': 3,
+    }
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -89,25 +220,205 @@ class CartItemViewSet(ModelViewSet):
         return serializers.CartItemSerializer
 
     def get_serializer_context(self):
-        return {'cart_id': self.kwargs['cart_pk']}
+        return {'cart_id': self.kwargs['cart_pk'], 'request': self.request}
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=['POST'], url_path='bulk')
+    @idempotent
+    def bulk(self, request, cart_pk=None):
+        """Adds a list of {product, quantity} to the cart at once."""
+        serializer = self.get_bulk_serializer(request)
+        items = serializer.save()
+        return Response(
+            serializers.AddCartItemSerializer(items, many=True).data,
+            status=status.HTTP_201_CREATED)
+
+    def get_bulk_serializer(self, request):
+        serializer = serializers.BulkAddCartItemSerializer(
+            data=request.data, many=True, allow_empty=False,
+            context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        return serializer
 
     def get_queryset(self):
-        return models.CartItem.objects \
-            .filter(cart_id=self.kwargs['cart_pk']) \
-            .prefetch_related('product')
+        queryset = models.CartItem.objects.filter(cart_id=self.kwargs['cart_pk'])
+        selection = FieldSelection.from_request(self.request)
+        if selection.includes('total_price'):
+            queryset = queryset.with_total_price()
+        if selection.includes('product'):
+            queryset = queryset.prefetch_related(prefetch_products(selection, 'product', 'product'))
+        return queryset
+
+
+def get_redis_cart(cart_id, selection, path, with_products):
+    """
+    Builds an unsaved Cart from its copy in the RedisCartStore, with its items
+    prefetched as CartItems whose id is their product id.
+    """
+    try:
+        cart_id = UUID(str(cart_id))
+    except ValueError:
+        raise NotFound()
+    stored = carts.get_cart_store().get(cart_id)
+    if stored is None:
+        raise NotFound()
+
+    created_at, quantities = stored
+    cart = models.Cart(id=cart_id, created_at=created_at)
+    items = [
+        models.CartItem(id=product_id, cart=cart, product_id=product_id, quantity=quantity)
+        for product_id, quantity in sorted(quantities.items())
+    ]
+    if with_products and items:
+        products = models.Product.objects.all()
+        if selection.expands(join(path, 'product')):
+            products = select_products(products.with_prices(), selection, join(path, 'product'))
+        products = products.in_bulk(quantities)
+        # Products deleted since they were added are skipped, as the
+        # database would have deleted their items.
+        items = [item for item in items if item.product_id in products]
+        for item in items:
+            item.product = products[item.product_id]
+            # What CartItemQuerySet.with_total_price() annotates.
+            item.total_price = item.product.unit_price * item.quantity
+    cart.total_price = sum(item.total_price for item in items) if with_products and items else None
+    cart._prefetched_objects_cache = {'cartitems': items}
+    return cart
+
+
+class RedisCartViewSet(CartViewSet):
+    """
+    CartViewSet for STORE_CART_BACKEND = 'redis', see store.carts.
+    """
+    query_budgets = {'create': 0, 'retrieve': 1, 'destroy': 5}
+
+    def create(self, request, *args, **kwargs):
+        cart_id, created_at = carts.get_cart_store().create()
+        cart = models.Cart(id=cart_id, created_at=created_at)
+        cart.total_price = None
+        cart._prefetched_objects_cache = {'cartitems': []}
+        return Response(self.get_serializer(cart).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        selection = FieldSelection.from_request(request)
+        with_products = selection.includes('total_price') \
+            or selection.includes('cartitems.product') \
+            or selection.includes('cartitems.total_price')
+        cart = get_redis_cart(kwargs['pk'], selection, 'cartitems', with_products)
+        return Response(self.get_serializer(cart).data)
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            cart_id = UUID(kwargs['pk'])
+        except ValueError:
+            raise NotFound()
+        if not carts.get_cart_store().delete(cart_id):
+            raise NotFound()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RedisCartItemViewSet(CartItemViewSet):
+    """
+    CartItemViewSet for STORE_CART_BACKEND = 'redis', see store.carts.
+    """
+    query_budgets = {
+        'list': 1, 'retrieve': 1, 'create': 1, 'bulk': 1,
+        'partial_update': 1, 'destroy': 0,
+    }
+
+    def get_items(self):
+        selection = FieldSelection.from_request(self.request)
+        with_products = selection.includes('product') or selection.includes('total_price')
+        cart = get_redis_cart(self.kwargs['cart_pk'], selection, '', with_products)
+        return cart.cartitems.all()
+
+    def get_item(self):
+        product_id = self.get_product_id()
+        for item in self.get_items():
+            if item.id == product_id:
+                return item
+        raise NotFound()
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_items(), many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_item()).data)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data['product']
+        quantity = carts.get_cart_store().add_item(
+            self.get_cart_id(), product.id, serializer.validated_data['quantity'])
+        if quantity is None:
+            raise NotFound()
+        item = models.CartItem(id=product.id, product=product, quantity=quantity)
+        return Response(self.get_serializer(item).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['POST'], url_path='bulk')
+    @idempotent
+    def bulk(self, request, cart_pk=None):
+        quantities = self.get_bulk_serializer(request).get_quantities()
+        added = carts.get_cart_store().add_items(self.get_cart_id(), quantities)
+        if added is None:
+            raise NotFound()
+        items = [
+            models.CartItem(id=product_id, product_id=product_id, quantity=quantity)
+            for product_id, quantity in zip(quantities, added)
+        ]
+        return Response(
+            serializers.AddCartItemSerializer(items, many=True).data,
+            status=status.HTTP_201_CREATED)
+
+    def partial_update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        if 'quantity' not in serializer.validated_data:
+            item = self.get_item()
+        else:
+            item = models.CartItem(quantity=serializer.validated_data['quantity'])
+            if not carts.get_cart_store().set_item(self.get_cart_id(), self.get_product_id(), item.quantity):
+                raise NotFound()
+        return Response(self.get_serializer(item).data)
+
+    def destroy(self, request, *args, **kwargs):
+        if not carts.get_cart_store().remove_item(self.get_cart_id(), self.get_product_id()):
+            raise NotFound()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_cart_id(self):
+        try:
+            return UUID(self.kwargs['cart_pk'])
+        except ValueError:
+            raise NotFound()
+
+    def get_product_id(self):
+        try:
+            return int(self.kwargs['pk'])
+        except ValueError:
+            raise NotFound()
 
 
 class CustomerViewSet(ModelViewSet):
     serializer_class = serializers.CustomerSerializer
     queryset = models.Customer.objects
     permission_classes = [FullDjangoModelPermissions]
+    # Includes the query that loads the user's permissions when they aren't
+    # cached, except for me.
+    query_budgets = {
+        'list': 2, 'retrieve': 2, 'create': 2,
+        'update': 3, 'partial_update': 3, 'destroy': 5, 'me': 2,
+    }
 
     @action(detail=False, methods=['GET', 'PUT'], permission_classes=[IsAuthenticated], serializer_class=serializers.CreateUserCustomerSerializer)
     def me(self, request):
-        try:
-            customer = models.Customer.objects.get(user_id=request.user.id)
-        except models.Customer.DoesNotExist:
-            customer = None
+        customer_id = get_customer_id(request.user)
+        customer = customer_id and models.Customer.objects.filter(pk=customer_id).first()
 
         if request.method == 'GET':
             if not customer:
@@ -125,24 +436,86 @@ class CustomerViewSet(ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
             
 
+def prefers_async(request):
+    # RFC 7240, e.g. `Prefer: respond-async, wait=10`.
+    preferences = request.headers.get('Prefer', '').split(',')
+    return any(preference.strip().lower() == 'respond-async' for preference in preferences)
+
+
 class OrderViewSet(ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete', 'head', 'options']
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = OrderFilter
+    ordering_fields = ['placed_at']
+    # Newest first. Pages are only cut with ?cursor=, as before.
+    ordering = ['-placed_at']
+    pagination_class = OptInKeysetPagination
+    throttle_scope = 'orders'
+    # partial_update includes the 6 queries that record a completed order in
+    # the daily sales and destroy the one that unlinks the order from its
+    # checkout. payment_status takes a single batch of orders.
+    query_budgets = {
+        'list': 4, 'retrieve': 4, 'create': 15,
+        'partial_update': 8, 'destroy': 4, 'payment_status': 10,
+    }
+
+    @classmethod
+    def get_query_budgets(cls):
+        if carts.get_backend() == carts.REDIS_BACKEND:
+            # The 7 queries that write the Redis cart to the database first.
+            return {**cls.query_budgets, 'create': cls.query_budgets['create'] + 7}
+        return cls.query_budgets
 
     def get_permissions(self):
-        if self.request.method in ['PATCH', 'DELETE']:
+        if self.request.method in ['PATCH', 'DELETE'] or self.action == 'payment_status':
             return [IsAdminUser()]
         return [IsAuthenticated()]
+
+    def get_throttles(self):
+        # Only placing orders is throttled, not the admin's updates.
+        if self.action != 'create':
+            return []
+        return super().get_throttles()
+
+    @action(detail=False, methods=['POST'], url_path='payment-status')
+    def payment_status(self, request):
+        """
+        Moves a list of up to PAYMENT_STATUS_BATCH_SIZE orders to one payment
+        status, e.g. {"order_ids": [1, 2], "payment_status": "C"}, and reports
+        the outcome for each id.
+        """
+        serializer = serializers.BulkUpdateOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': serializer.save()})
     
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = serializers.CreateOrderSerializer(
             data=request.data,
             context={'user': self.request.user},
         )
         serializer.is_valid(raise_exception=True)
+        if prefers_async(request):
+            return self.create_checkout(**serializer.validated_data)
         order = serializer.save()
+        prefetch_related_objects([order], 'orderitems__product')
         serializer = serializers.OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def create_checkout(self, customer_id, cart_id):
+        """Queues the order to be placed by store.tasks.place_orders."""
+        checkout = models.Checkout.objects.create(customer_id=customer_id, cart_id=cart_id)
+        shard = checkouts.get_shard(customer_id)
+        transaction.on_commit(lambda: tasks.place_orders.delay(shard))
+        return Response(
+            serializers.CheckoutSerializer(checkout).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                'Location': reverse('checkouts-detail', args=[checkout.pk], request=self.request),
+                'Preference-Applied': 'respond-async',
+            },
+        )
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return serializers.CreateOrderSerializer
@@ -152,7 +525,72 @@ class OrderViewSet(ModelViewSet):
         
     def get_queryset(self):
         user =self.request.user
+        queryset = models.Order.objects.all()
+        selection = FieldSelection.from_request(self.request)
+        if self.action in ('list', 'retrieve'):
+            if selection.includes('orderitems.product'):
+                queryset = queryset.prefetch_related(
+                    prefetch_products(selection, 'orderitems.product', 'orderitems__product'))
+            elif selection.includes('orderitems'):
+                queryset = queryset.prefetch_related('orderitems')
+            if selection.expands('customer'):
+                queryset = queryset.select_related('customer')
         if user.is_staff:
-            return models.Order.objects.all()
-        customer_id = models.Customer.objects.only('id').get(user_id=user.id)
-        return models.Order.objects.filter(customer_id=customer_id)
\ No newline at end of file
+            return queryset
+        return queryset.filter(customer_id=get_customer_id(user))
+
+class CheckoutViewSet(RetrieveModelMixin, GenericViewSet):
+    """
+    The status of an order placed with `Prefer: respond-async`. With
+    `?wait=<seconds>` a pending checkout is held open until it is processed
+    or the time is up (at most STORE_CHECKOUT_MAX_WAIT seconds).
+    """
+    serializer_class = serializers.CheckoutSerializer
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'retrieve': 2}
+
+    def get_queryset(self):
+        queryset = models.Checkout.objects.all()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(customer__user_id=self.request.user.id)
+
+    def get_wait(self):
+        max_wait = getattr(settings, 'STORE_CHECKOUT_MAX_WAIT', 20)
+        try:
+            return min(max(float(self.request.query_params.get('wait', 0)), 0), max_wait)
+        except ValueError:
+            return 0
+
+    def retrieve(self, request, *args, **kwargs):
+        checkout = self.get_object()
+        wait = self.get_wait()
+        if checkout.status == models.Checkout.STATUS_PENDING and wait and checkouts.wait(checkout.pk, wait):
+            checkout.refresh_from_db()
+        return Response(self.get_serializer(checkout).data)
+
+
+class DailySalesViewSet(ListModelMixin, GenericViewSet):
+    """
+    Daily sales of completed orders for dashboards, read from the rollups
+    kept by store.rollups, newest day first. Filter with
+    ?date_after=&date_before= and page with ?cursor=.
+    """
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    ordering_fields = ['date', 'units', 'revenue', 'orders']
+    ordering = ['-date']
+    pagination_class = OptInKeysetPagination
+    query_budgets = {'list': 1}
+
+
+class ProductDailySalesViewSet(DailySalesViewSet):
+    queryset = models.ProductDailySales.objects.all()
+    serializer_class = serializers.ProductDailySalesSerializer
+    filterset_class = ProductDailySalesFilter
+
+
+class CollectionDailySalesViewSet(DailySalesViewSet):
+    queryset = models.CollectionDailySales.objects.all()
+    serializer_class = serializers.CollectionDailySalesSerializer
+    filterset_class = CollectionDailySalesFilter